@@ -0,0 +1,174 @@
+# Arquivo: agendador.py
+# Notificações automáticas: lembretes de agendamento, aniversários e alertas de retorno
+#
+# Os próximos disparos ficam numa fila de prioridade (heap) ordenada pelo horário.
+# A fila é atualizada incrementalmente a cada cadastro/edição de cliente ou
+# agendamento, sem varrer as tabelas a cada ciclo. Os aniversários são um disparo
+# diário que consulta o índice de aniversários (aniversarios.py). Cada envio tem uma
+# chave única (ex.: "aniversario:12:2026"), usada pela caixa de saída e, derivada
+# dela, como chave de idempotência no OneSignal: reiniciar o processo (mesmo sem o
+# disco) não duplica envios.
+
+import heapq
+import itertools
+import threading
+from datetime import datetime, time, timedelta
+
+from modelos import TZ_BRASIL
+
+# Disparos atrasados há mais que isso (ex.: app fora do ar) são descartados
+JANELA_ATRASO = timedelta(days=3)
+# Recarga completa de segurança: estende o horizonte dos lembretes e agenda o
+# aniversário do ano seguinte (disparos já enviados são barrados pela chave)
+INTERVALO_RECARGA = timedelta(hours=24)
+STATUS_COM_LEMBRETE = ("nao_confirmado", "confirmado")
+
+
+def _data_hora(valor):
+    if isinstance(valor, datetime):
+        return valor.astimezone(TZ_BRASIL)
+    return datetime.fromisoformat(valor).astimezone(TZ_BRASIL)
+
+
+class Agendador(threading.Thread):
+
+    def __init__(self, caixa, carregar, aniversariantes, horas_lembrete=24, dias_retorno=35, hora_envio=time(9, 0)):
+        super().__init__(name="agendador-notificacoes", daemon=True)
+        self.caixa = caixa
+        # carregar() -> (agendamentos futuros, clientes); chamado na partida e a cada INTERVALO_RECARGA
+        self.carregar = carregar
+        # aniversariantes(dia) -> clientes que comemoram no dia (IndiceAniversarios.do_dia)
+        self.aniversariantes = aniversariantes
+        self.antecedencia = timedelta(hours=horas_lembrete)
+        self.dias_retorno = timedelta(days=dias_retorno)
+        self.hora_envio = hora_envio
+        self._heap = []
+        self._atual = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._parar = False
+        self.ultima_recarga = None
+
+    # ---------- fila ----------
+
+    def _agendar(self, vaga, quando, chave, titulo, conteudo):
+        """`vaga` identifica o disparo de uma entidade (ex.: ("lembrete", 7)); um novo substitui o anterior."""
+        with self._cond:
+            anterior = self._atual.get(vaga)
+            self._atual[vaga] = (quando, chave, titulo, conteudo)
+            if anterior and anterior[:2] == (quando, chave):
+                return  # já está no heap
+            heapq.heappush(self._heap, (quando, next(self._seq), vaga, chave))
+            self._cond.notify()
+
+    def _cancelar(self, vaga):
+        with self._cond:
+            # A entrada antiga fica no heap e é ignorada ao sair (remoção preguiçosa)
+            self._atual.pop(vaga, None)
+
+    def pendentes(self, limite=20):
+        """Próximos disparos, para exibição."""
+        with self._cond:
+            itens = sorted(self._atual.items(), key=lambda item: item[1][0])[:limite]
+        return [{"tipo": vaga[0], "quando": quando, "titulo": titulo, "conteudo": conteudo}
+                for vaga, (quando, _chave, titulo, conteudo) in itens]
+
+    # ---------- eventos de dados ----------
+
+    def atualizar_agendamento(self, ag_id, data_hora, status, nome):
+        vaga = ("lembrete", ag_id)
+        inicio = _data_hora(data_hora)
+        if status not in STATUS_COM_LEMBRETE or inicio <= datetime.now(TZ_BRASIL):
+            self._cancelar(vaga)
+            return
+        self._agendar(vaga, inicio - self.antecedencia, f"lembrete:{ag_id}:{inicio.isoformat()}",
+                      "⏰ Lembrete de agendamento",
+                      f"{nome} tem horário em {inicio.strftime('%d/%m')} às {inicio.strftime('%H:%M')}.")
+
+    def remover_agendamento(self, ag_id):
+        self._cancelar(("lembrete", ag_id))
+
+    def agendar_aniversarios(self, dia):
+        """Disparo do dia: na hora do envio, uma mensagem por aniversariante do índice."""
+        self._agendar(("aniversarios",), datetime.combine(dia, self.hora_envio, TZ_BRASIL),
+                      f"aniversarios:{dia.isoformat()}", "🎂 Aniversários", "Parabéns às aniversariantes do dia")
+
+    def _enfileirar_aniversarios(self, dia):
+        for cliente in self.aniversariantes(dia):
+            nome = cliente.get('nome') or "-"
+            telefone = cliente.get('telefone') or ""
+            self.caixa.enfileirar("🎂 Aniversário",
+                                  f"Hoje é aniversário de {nome}! Envie os parabéns 💖 {telefone}".strip(),
+                                  chave=f"aniversario:{cliente['id']}:{dia.year}", nome="aniversario")
+
+    def atualizar_cliente(self, cliente):
+        cliente_id = cliente['id']
+        nome = cliente.get('nome') or "-"
+        telefone = cliente.get('telefone') or ""
+
+        ultimo = cliente.get('ultimo_atendimento')
+        if ultimo:
+            ultimo_dt = _data_hora(ultimo)
+            dia = (ultimo_dt + self.dias_retorno).date()
+            self._agendar(("retorno", cliente_id), datetime.combine(dia, self.hora_envio, TZ_BRASIL),
+                          f"retorno:{cliente_id}:{ultimo_dt.date().isoformat()}", "💖 Alerta de retorno",
+                          f"{nome} não vem desde {ultimo_dt.strftime('%d/%m/%Y')}. Que tal chamar? {telefone}".strip())
+        else:
+            self._cancelar(("retorno", cliente_id))
+
+    def remover_cliente(self, cliente_id):
+        self._cancelar(("retorno", cliente_id))
+
+    # ---------- thread ----------
+
+    def recarregar(self):
+        agendamentos, clientes = self.carregar()
+        for ag in agendamentos:
+            self.atualizar_agendamento(ag.id, ag.inicio, ag.status, ag.cliente_nome)
+        for cliente in clientes:
+            self.atualizar_cliente(cliente)
+        if ("aniversarios",) not in self._atual:
+            self.agendar_aniversarios(datetime.now(TZ_BRASIL).date())
+        self.ultima_recarga = datetime.now(TZ_BRASIL)
+
+    def parar(self):
+        with self._cond:
+            self._parar = True
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            if self.ultima_recarga is None or datetime.now(TZ_BRASIL) - self.ultima_recarga > INTERVALO_RECARGA:
+                try:
+                    self.recarregar()
+                except Exception:
+                    # Sem banco agora: tenta de novo em alguns minutos
+                    self.ultima_recarga = datetime.now(TZ_BRASIL) - INTERVALO_RECARGA + timedelta(minutes=5)
+
+            with self._cond:
+                if self._parar:
+                    return
+                vencidos = []
+                agora = datetime.now(TZ_BRASIL)
+                while self._heap and self._heap[0][0] <= agora:
+                    quando, _seq, vaga, chave = heapq.heappop(self._heap)
+                    atual = self._atual.get(vaga)
+                    if atual is None or atual[1] != chave:
+                        continue  # disparo substituído ou cancelado
+                    del self._atual[vaga]
+                    vencidos.append((vaga, atual))
+                if not vencidos:
+                    espera = 300.0
+                    if self._heap:
+                        espera = min(espera, (self._heap[0][0] - agora).total_seconds())
+                    self._cond.wait(max(0.0, espera))
+                    continue
+
+            for vaga, (quando, chave, titulo, conteudo) in vencidos:
+                if vaga == ("aniversarios",):
+                    if agora - quando <= JANELA_ATRASO:
+                        self._enfileirar_aniversarios(quando.date())
+                    self.agendar_aniversarios(quando.date() + timedelta(days=1))
+                elif agora - quando <= JANELA_ATRASO:
+                    # Chave repetida (já enviada antes de um reinício) é ignorada pela caixa de saída
+                    self.caixa.enfileirar(titulo, conteudo, chave=chave, nome=vaga[0])
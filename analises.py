@@ -0,0 +1,127 @@
+# Arquivo: analises.py
+# Agregados de atendimento mantidos por delta: contagem diária por status, visitas
+# por cliente e mês, e índice de clientes ordenado pelo último atendimento
+#
+# Montado uma vez a partir da cópia local; depois cada alteração da sincronização
+# (antes, depois) desfaz a contribuição antiga e soma a nova. A página de análises
+# só lê estes contadores, sem percorrer agendamentos nem clientes.
+
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime
+
+from modelos import TZ_BRASIL
+
+# Agendamentos que já passaram com um destes status contam como falta
+STATUS_FALTA = ("nao_confirmado", "confirmado")
+
+
+def _dia(agendamento):
+    return datetime.fromisoformat(agendamento['data_hora']).astimezone(TZ_BRASIL).date()
+
+
+class ResumoAtendimentos:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_dia = Counter()         # (dia, status) → agendamentos
+        self._visitas = Counter()         # ("2026-10", cliente_id) → realizados
+        self._clientes_mes = Counter()    # "2026-10" → clientes distintas atendidas
+        self._retorno = []                # [(ultimo_atendimento, cliente_id)] ordenada
+        self._chave_retorno = {}          # cliente_id → item em _retorno
+
+    def carregar(self, agendamentos, clientes):
+        with self._lock:
+            for agendamento in agendamentos:
+                self._somar_agendamento(agendamento, 1)
+            itens = []
+            for cliente in clientes:
+                item = self._item_retorno(cliente)
+                if item:
+                    itens.append(item)
+                    self._chave_retorno[cliente['id']] = item
+            self._retorno = sorted(itens)
+
+    # ---------- manutenção ----------
+
+    def _somar_agendamento(self, agendamento, sinal):
+        dia = _dia(agendamento)
+        chave = (dia, agendamento['status'])
+        self._por_dia[chave] += sinal
+        if not self._por_dia[chave]:
+            del self._por_dia[chave]
+        if agendamento['status'] != "realizado":
+            return
+        visita = (dia.strftime("%Y-%m"), agendamento['cliente_id'])
+        self._visitas[visita] += sinal
+        if self._visitas[visita] == 0:
+            del self._visitas[visita]
+            self._clientes_mes[visita[0]] -= 1
+        elif sinal > 0 and self._visitas[visita] == 1:
+            self._clientes_mes[visita[0]] += 1
+
+    def _item_retorno(self, cliente):
+        ultimo = cliente.get('ultimo_atendimento')
+        if not ultimo:
+            return None
+        return (datetime.fromisoformat(ultimo).astimezone(TZ_BRASIL), cliente['id'])
+
+    def aplicar_agendamentos(self, alteracoes):
+        with self._lock:
+            for antes, depois in alteracoes:
+                if antes:
+                    self._somar_agendamento(antes, -1)
+                if depois:
+                    self._somar_agendamento(depois, 1)
+
+    def aplicar_clientes(self, alteracoes):
+        with self._lock:
+            for antes, depois in alteracoes:
+                cliente_id = (depois or antes)['id']
+                anterior = self._chave_retorno.pop(cliente_id, None)
+                if anterior:
+                    del self._retorno[bisect_left(self._retorno, anterior)]
+                item = self._item_retorno(depois) if depois else None
+                if item:
+                    insort(self._retorno, item)
+                    self._chave_retorno[cliente_id] = item
+
+    # ---------- consultas ----------
+
+    def por_mes(self, meses, hoje):
+        """Uma linha por mês ("2026-10") com totais por status, faltas e visitas por cliente."""
+        pedidos = set(meses)
+        linhas = {mes: Counter() for mes in meses}
+        with self._lock:
+            for (dia, status), total in self._por_dia.items():
+                mes = dia.strftime("%Y-%m")
+                if mes not in pedidos:
+                    continue
+                linha = linhas[mes]
+                linha["agendamentos"] += total
+                linha[status] += total
+                if status in STATUS_FALTA and dia < hoje:
+                    linha["faltas"] += total
+            clientes_mes = {mes: self._clientes_mes[mes] for mes in meses}
+        resultado = []
+        for mes in meses:
+            linha = linhas[mes]
+            atendidas = clientes_mes[mes]
+            resultado.append({
+                "mes": mes,
+                "agendamentos": linha["agendamentos"],
+                "realizados": linha["realizado"],
+                "cancelados": linha["cancelado"],
+                "faltas": linha["faltas"],
+                "clientes_atendidas": atendidas,
+                "visitas_por_cliente": round(linha["realizado"] / atendidas, 2) if atendidas else 0.0,
+            })
+        return resultado
+
+    def atrasadas(self, antes_de, limite=200):
+        """([(cliente_id, último atendimento)], total) das clientes atendidas pela última vez antes
+        de `antes_de` (com fuso), as mais antigas primeiro: busca binária no índice, sem varrer as clientes."""
+        with self._lock:
+            fim = bisect_left(self._retorno, (antes_de,))
+            return [(cliente_id, ultimo) for ultimo, cliente_id in self._retorno[:min(fim, limite)]], fim
@@ -0,0 +1,55 @@
+# Arquivo: aniversarios.py
+# Índice de aniversários por (mês, dia), reconstruído só quando as clientes mudam
+
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+
+
+class IndiceAniversarios:
+    """Responde "aniversariantes de hoje / da semana / do mês" sem varrer as clientes."""
+
+    __slots__ = ("_por_dia",)
+
+    def __init__(self, clientes):
+        por_dia = defaultdict(list)
+        for cliente in clientes:
+            nascimento = cliente.get("data_nascimento")
+            if not nascimento:
+                continue
+            try:
+                nasc = date.fromisoformat(nascimento[:10])
+            except ValueError:
+                continue
+            por_dia[(nasc.month, nasc.day)].append(cliente)
+        for lista in por_dia.values():
+            lista.sort(key=lambda c: c.get("nome") or "")
+        self._por_dia = dict(por_dia)
+
+    def __len__(self):
+        return sum(len(lista) for lista in self._por_dia.values())
+
+    def do_dia(self, dia):
+        clientes = list(self._por_dia.get((dia.month, dia.day), ()))
+        # Quem nasceu em 29/02 comemora em 28/02 nos anos não bissextos
+        if dia.month == 2 and dia.day == 28 and not calendar.isleap(dia.year):
+            clientes.extend(self._por_dia.get((2, 29), ()))
+        return clientes
+
+    def do_periodo(self, inicio, dias):
+        """Lista de (data, cliente) para os `dias` dias a partir de `inicio`."""
+        resultado = []
+        for i in range(dias):
+            dia = inicio + timedelta(days=i)
+            resultado.extend((dia, cliente) for cliente in self.do_dia(dia))
+        return resultado
+
+    def hoje(self, hoje):
+        return self.do_dia(hoje)
+
+    def semana(self, hoje):
+        return self.do_periodo(hoje, 7)
+
+    def mes(self, hoje):
+        inicio = hoje.replace(day=1)
+        return self.do_periodo(inicio, calendar.monthrange(hoje.year, hoje.month)[1])
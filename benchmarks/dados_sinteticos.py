@@ -0,0 +1,57 @@
+# Arquivo: benchmarks/dados_sinteticos.py
+# Clientes e agendamentos sintéticos, determinísticos (mesma semente = mesmos dados)
+
+import random
+from datetime import date, datetime, timedelta, timezone
+
+from modelos import STATUS
+
+NOMES = ["Ana", "Beatriz", "Camila", "Débora", "Elaine", "Fernanda", "Gabriela", "Helena", "Íris",
+         "Juliana", "Karina", "Larissa", "Márcia", "Natália", "Patrícia", "Renata", "Simone", "Tânia"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho", "Ferreira",
+              "Gonçalves", "Araújo", "Ribeiro", "Almeida", "Conceição", "Magalhães"]
+DURACOES = [30, 45, 60, 60, 90]
+
+
+def _datas(rnd, agora):
+    """created_at/updated_at espalhados no passado, como num banco em uso."""
+    criado = agora - timedelta(days=rnd.randrange(1, 720), minutes=rnd.randrange(1440))
+    atualizado = min(agora - timedelta(minutes=1), criado + timedelta(days=rnd.randrange(30)))
+    return {"created_at": criado.isoformat(), "updated_at": atualizado.isoformat(), "deleted_at": None}
+
+
+def gerar(qtd_agendamentos, semente=42, agora=None):
+    """{tabela: linhas}: `qtd_agendamentos` agendamentos de ~2 anos em volta de hoje e uma cliente a cada 4."""
+    rnd = random.Random(semente)
+    agora = (agora or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+    qtd_clientes = max(1, qtd_agendamentos // 4)
+
+    clientes = []
+    for i in range(1, qtd_clientes + 1):
+        nascimento = date(1960, 1, 1) + timedelta(days=rnd.randrange(365 * 45))
+        clientes.append({
+            "id": i,
+            "nome": f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}",
+            "telefone": f"119{rnd.randrange(10**7, 10**8)}",
+            "data_nascimento": nascimento.isoformat() if rnd.random() < 0.8 else None,
+            "observacoes": None,
+            "ultimo_atendimento": (agora - timedelta(days=rnd.randrange(1, 120))).isoformat() if rnd.random() < 0.6 else None,
+            **_datas(rnd, agora),
+        })
+
+    agendamentos = []
+    status = list(STATUS)
+    for i in range(1, qtd_agendamentos + 1):
+        # Horários cheios/meia hora, das 8h às 20h (Brasília = UTC-3)
+        dia = agora.date() + timedelta(days=rnd.randrange(-540, 180))
+        inicio = datetime(dia.year, dia.month, dia.day, 11, tzinfo=timezone.utc) + timedelta(minutes=30 * rnd.randrange(24))
+        agendamentos.append({
+            "id": i,
+            "cliente_id": rnd.randrange(1, qtd_clientes + 1),
+            "data_hora": inicio.isoformat(),
+            "duracao_minutos": rnd.choice(DURACOES),
+            "status": rnd.choice(status) if inicio < agora else rnd.choice(status[:2]),
+            "observacoes": None,
+            **_datas(rnd, agora),
+        })
+    return {"clientes": clientes, "agendamentos": agendamentos}
@@ -0,0 +1,183 @@
+# Arquivo: benchmarks/executar.py
+# Benchmark das páginas do main.py com dados sintéticos e um PostgREST local
+#
+# Uso (na raiz do projeto):
+#   python -m benchmarks.executar                       # 1k, 10k e 100k agendamentos
+#   python -m benchmarks.executar --tamanhos 1000 10000
+#   python -m benchmarks.executar --comparar benchmarks/resultados/base.json
+#
+# Cada tamanho roda num processo separado (caches e threads do app são por processo).
+# Para cada página são medidos a primeira visita e um rerun: latência, consultas ao
+# banco, bytes recebidos e pico de memória (acima do já alocado antes da etapa, para que
+# páginas e estruturas anteriores não entrem na conta). O roteiro roda duas vezes, do zero:
+# a primeira mede tempo e rede, a segunda só memória (o tracemalloc deixa tudo mais lento).
+# Consultas e bytes são determinísticos; latências só se comparam na mesma máquina.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+PAGINAS = ["🏠 Início", "👩‍🦰 Clientes", "📅 Agenda", "📊 Análises", "🔔 Notificações", "⚙️ Configurações"]
+TAMANHOS = [1000, 10000, 100000]
+
+# Regressão = piora acima da tolerância relativa E do mínimo absoluto (evita ruído em números pequenos)
+TOLERANCIAS = {
+    "latencia_ms": (0.25, 50),
+    "consultas": (0.0, 1),
+    "bytes_recebidos": (0.25, 10_000),
+    "pico_memoria_kb": (0.25, 1_000),
+}
+
+
+def medir(app, servidor, acao, memoria):
+    servidor.zerar_contadores()
+    if memoria:
+        # O pico conta a partir do que já estava alocado: só o que esta etapa acrescentou
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+    inicio = time.perf_counter()
+    acao()
+    latencia = (time.perf_counter() - inicio) * 1000
+    contadores = servidor.contadores()
+    return {
+        "latencia_ms": round(latencia, 1),
+        "consultas": contadores["consultas"],
+        "bytes_recebidos": contadores["bytes_recebidos"],
+        "pico_memoria_kb": round((tracemalloc.get_traced_memory()[1] - memoria_inicial) / 1024) if memoria else None,
+        "erros": [str(e.value) for e in app.exception],
+    }
+
+
+def roteiro(servidor, memoria):
+    """Partida sem espelho, todas as páginas (visita + rerun) e nova partida já com o espelho em disco."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["DADOS_DIR"] = tempfile.mkdtemp(prefix="benchmark-")
+    script = os.path.join(RAIZ, "main.py")
+    medidas = []
+    for partida in ("partida_fria", "partida_com_espelho"):
+        # Novo processo simulado: sem conexões, cópia em memória, índices nem cache; o espelho em disco fica
+        st.cache_resource.clear()
+        app = AppTest.from_file(script, default_timeout=600)
+        medidas.append((PAGINAS[0], partida, medir(app, servidor, app.run, memoria)))
+        if partida == "partida_fria":
+            for pagina in PAGINAS:
+                medidas.append((pagina, "visita", medir(app, servidor, lambda: app.sidebar.radio[0].set_value(pagina).run(), memoria)))
+                medidas.append((pagina, "rerun", medir(app, servidor, app.run, memoria)))
+    return medidas
+
+
+def executar_tamanho(tamanho):
+    """Roda no processo filho: sobe o servidor, abre o app e visita todas as páginas."""
+    sys.path.insert(0, RAIZ)
+    from benchmarks.dados_sinteticos import gerar
+    from benchmarks.postgrest_local import PostgrestLocal
+
+    servidor = PostgrestLocal(gerar(tamanho))
+    os.environ.update({
+        "SUPABASE_URL": servidor.iniciar(),
+        "SUPABASE_ANON_KEY": "benchmark.local.chave",
+        "SYNC_INTERVALO": "3600",
+        "ONESIGNAL_APP_ID": "",
+        "ONESIGNAL_REST_API_KEY": "",
+    })
+    tempo = roteiro(servidor, memoria=False)
+    tracemalloc.start()
+    memoria = roteiro(servidor, memoria=True)
+    tracemalloc.stop()
+    servidor.parar()
+
+    resultados = []
+    for (pagina, etapa, medida), (_p, _e, medida_memoria) in zip(tempo, memoria):
+        medida["pico_memoria_kb"] = medida_memoria["pico_memoria_kb"]
+        resultados.append({"tamanho": tamanho, "pagina": pagina, "etapa": etapa, **medida})
+    return resultados
+
+
+def chave(linha):
+    return (linha["tamanho"], linha["pagina"], linha["etapa"])
+
+
+def comparar(base, atual):
+    """Linhas (métrica, antes, depois) que pioraram além da tolerância."""
+    por_chave = {chave(l): l for l in base}
+    regressoes = []
+    for linha in atual:
+        anterior = por_chave.get(chave(linha))
+        if not anterior:
+            continue
+        for metrica, (relativa, absoluta) in TOLERANCIAS.items():
+            antes, depois = anterior[metrica], linha[metrica]
+            if depois - antes > max(antes * relativa, absoluta):
+                regressoes.append({**dict(zip(("tamanho", "pagina", "etapa"), chave(linha))),
+                                   "metrica": metrica, "antes": antes, "depois": depois})
+    return regressoes
+
+
+def versao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "sem-git"
+
+
+def imprimir(resultados):
+    print(f"{'tamanho':>8}  {'página':<18} {'etapa':<20} {'ms':>9} {'consultas':>9} {'KB rec.':>9} {'pico KB':>9}")
+    for l in resultados:
+        erro = "  ERRO: " + l["erros"][0] if l["erros"] else ""
+        print(f"{l['tamanho']:>8}  {l['pagina']:<18} {l['etapa']:<20} {l['latencia_ms']:>9} {l['consultas']:>9} "
+              f"{l['bytes_recebidos'] // 1024:>9} {l['pico_memoria_kb']:>9}{erro}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS, help="quantidades de agendamentos")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior; sai com código 1 se houver regressão")
+    parser.add_argument("--saida", help="arquivo de resultado (padrão: benchmarks/resultados/<data>_<commit>.json)")
+    parser.add_argument("--filho", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        json.dump(executar_tamanho(args.filho), sys.stdout)
+        return
+
+    resultados = []
+    for tamanho in args.tamanhos:
+        print(f"Executando {tamanho} agendamentos...", file=sys.stderr)
+        filho = subprocess.run([sys.executable, "-m", "benchmarks.executar", "--filho", str(tamanho)],
+                               cwd=RAIZ, capture_output=True, text=True)
+        if filho.returncode != 0:
+            sys.exit(filho.stderr)
+        resultados.extend(json.loads(filho.stdout))
+    imprimir(resultados)
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}_{versao_git()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump({"versao": versao_git(), "data": datetime.now().isoformat(timespec="seconds"),
+                   "resultados": resultados}, f, ensure_ascii=False, indent=1)
+    print(f"Resultado salvo em {saida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+        regressoes = comparar(base, resultados)
+        for r in regressoes:
+            print(f"REGRESSÃO {r['tamanho']} {r['pagina']} {r['etapa']}: {r['metrica']} {r['antes']} -> {r['depois']}")
+        if regressoes:
+            sys.exit(1)
+        print("Sem regressões em relação a", args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Arquivo: benchmarks/onesignal_local.py
+# Servidor local que imita GET/POST /notifications da API REST do OneSignal
+#
+# Guarda cada requisição recebida (corpo e cabeçalhos) e responde conforme um roteiro:
+# uma lista de (status, cabeçalhos) consumida uma por requisição; esgotado o roteiro,
+# responde 200 com o id da notificação. Como o OneSignal, uma idempotency_key repetida
+# devolve o id da primeira notificação sem criar outra.
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class OneSignalLocal:
+    """`iniciar()` devolve a URL base para ONESIGNAL_API_URL."""
+
+    def __init__(self, rest_key="chave-local"):
+        self.rest_key = rest_key
+        self.roteiro = []
+        self.requisicoes = []       # [{"corpo", "cabecalhos", "status", "em"}]
+        self.notificacoes = {}      # idempotency_key → id
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    def responder_com(self, *respostas):
+        """Enfileira respostas (status, cabeçalhos) para as próximas requisições."""
+        with self._lock:
+            self.roteiro.extend(respostas)
+
+    def _criar(self, corpo):
+        chave = corpo.get("idempotency_key") or str(uuid.uuid4())
+        novo = chave not in self.notificacoes
+        notificacao_id = self.notificacoes.setdefault(chave, str(uuid.uuid4()))
+        destinatarios = corpo.get("include_subscription_ids")
+        return {"id": notificacao_id, "recipients": len(destinatarios) if destinatarios else 1, "repetida": not novo}
+
+    def iniciar(self):
+        estado = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, corpo, status=200, cabecalhos=None):
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                for chave, valor in (cabecalhos or {}).items():
+                    self.send_header(chave, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def do_GET(self):
+                # Listagem de notificações: usada pela verificação de saúde para validar a chave
+                caminho = self.path.split("?", 1)[0].rstrip("/")
+                if not caminho.endswith("/notifications"):
+                    return self._responder({"errors": ["HTTP 404"]}, 404)
+                if self.headers.get("Authorization") != f"Basic {estado.rest_key}":
+                    return self._responder({"errors": ["HTTP 403"]}, 403)
+                with estado._lock:
+                    ids = list(estado.notificacoes.values())
+                self._responder({"total_count": len(ids), "offset": 0, "limit": 1,
+                                 "notifications": [{"id": i} for i in ids[-1:]]})
+
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                corpo = json.loads(self.rfile.read(tamanho) or b"null")
+                with estado._lock:
+                    status, cabecalhos = estado.roteiro.pop(0) if estado.roteiro else (200, {})
+                    if not self.path.rstrip("/").endswith("/notifications"):
+                        status, cabecalhos = 404, {}
+                    elif self.headers.get("Authorization") != f"Basic {estado.rest_key}":
+                        status, cabecalhos = 403, {}
+                    estado.requisicoes.append({"corpo": corpo, "cabecalhos": dict(self.headers), "status": status,
+                                               "em": time.time()})
+                    resposta = estado._criar(corpo) if status == 200 else {"errors": [f"HTTP {status}"]}
+                self._responder(resposta, status, cabecalhos)
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._servidor.serve_forever, name="onesignal-local", daemon=True).start()
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/api/v1"
+
+    def parar(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
@@ -0,0 +1,302 @@
+# Arquivo: benchmarks/postgrest_local.py
+# Servidor local que imita o subconjunto da API REST do Supabase (PostgREST) usado pelo app
+#
+# Dados em memória; cada requisição é contada (quantidade e bytes) para o benchmark.
+# Suporta select com embutido "clientes(...)", filtros eq/gte/gt/lt/lte/in/is, order,
+# offset/limit, Prefer: count=exact, insert (POST), update (PATCH) e as funções
+# RPC de sql/ reimplementadas em Python (POST /rpc/<nome>).
+
+import json
+import threading
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+def _valor(texto):
+    if texto == "null":
+        return None
+    if texto in ("true", "false"):
+        return texto == "true"
+    try:
+        return int(texto)
+    except ValueError:
+        return texto
+
+
+def _comparavel(valor):
+    """Datas ISO com fuso são comparadas como datetime; o resto como veio."""
+    if isinstance(valor, str) and len(valor) > 10 and valor[4] == "-" and "T" in valor:
+        return _data_iso(valor)
+    return valor
+
+
+@lru_cache(maxsize=None)
+def _data_iso(valor):
+    # Sem cache, ordenar/filtrar 100k linhas a cada página do delta dominaria o tempo medido
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        return valor
+
+
+def _filtro(coluna, expressao):
+    negado = expressao.startswith("not.")
+    if negado:
+        expressao = expressao[4:]
+    op, _, alvo = expressao.partition(".")
+    if op == "in":
+        valores = {_valor(v) for v in alvo.strip("()").split(",") if v}
+        teste = lambda v: v in valores
+    elif op == "is":
+        esperado = _valor(alvo)
+        teste = lambda v: v is esperado
+    else:
+        ref = _comparavel(_valor(alvo))
+        comparar = {
+            "eq": lambda v: v == ref,
+            "neq": lambda v: v != ref,
+            "gt": lambda v: v is not None and v > ref,
+            "gte": lambda v: v is not None and v >= ref,
+            "lt": lambda v: v is not None and v < ref,
+            "lte": lambda v: v is not None and v <= ref,
+        }[op]
+        teste = lambda v: comparar(_comparavel(v))
+    return lambda linha: teste(linha.get(coluna)) != negado
+
+
+def _ordenar(linhas, ordem):
+    # Ordenações estáveis da última coluna para a primeira; nulos no fim (asc) ou no começo (desc)
+    for parte in reversed(ordem.split(",")):
+        coluna, *mods = parte.split(".")
+        desc = "desc" in mods
+        nulos_primeiro = "nullsfirst" in mods or (desc and "nullslast" not in mods)
+        cheias = [l for l in linhas if l.get(coluna) is not None]
+        vazias = [l for l in linhas if l.get(coluna) is None]
+        cheias.sort(key=lambda l: _comparavel(l[coluna]), reverse=desc)
+        linhas = vazias + cheias if nulos_primeiro else cheias + vazias
+    return linhas
+
+
+class PostgrestLocal:
+    """Tabelas {nome: [linhas]}; `iniciar()` devolve a URL base para SUPABASE_URL."""
+
+    def __init__(self, tabelas):
+        self.tabelas = {nome: {l['id']: dict(l) for l in linhas} for nome, linhas in tabelas.items()}
+        self._proximo_id = {nome: max(linhas, default=0) + 1 for nome, linhas in self.tabelas.items()}
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self.bytes_enviados = 0
+        self.bytes_recebidos = 0
+        self._servidor = None
+
+    def zerar_contadores(self):
+        with self._lock:
+            self.requisicoes = self.bytes_enviados = self.bytes_recebidos = 0
+
+    def contadores(self):
+        with self._lock:
+            return {"consultas": self.requisicoes, "bytes_recebidos": self.bytes_enviados,
+                    "bytes_enviados": self.bytes_recebidos}
+
+    # ---------- operações ----------
+
+    def _selecionar(self, tabela, params):
+        filtros, ordem, offset, limite, select = [], None, 0, None, "*"
+        for chave, valor in params:
+            if chave == "select":
+                select = valor
+            elif chave == "order":
+                ordem = valor
+            elif chave == "offset":
+                offset = int(valor)
+            elif chave == "limit":
+                limite = int(valor)
+            else:
+                filtros.append(_filtro(chave, valor))
+        linhas = [l for l in self.tabelas[tabela].values() if all(f(l) for f in filtros)]
+        if ordem:
+            linhas = _ordenar(linhas, ordem)
+        total = len(linhas)
+        linhas = linhas[offset:offset + limite if limite is not None else None]
+        return [self._projetar(tabela, l, select) for l in linhas], offset, total
+
+    def _projetar(self, tabela, linha, select):
+        colunas, embutidos = [], {}
+        for parte in _partes(select):
+            if "(" in parte:
+                nome, _, cols = parte.partition("(")
+                embutidos[nome] = cols.rstrip(")")
+            else:
+                colunas.append(parte)
+        saida = dict(linha) if "*" in colunas else {c: linha.get(c) for c in colunas}
+        for nome, cols in embutidos.items():
+            # agendamentos -> clientes (muitos-para-um por cliente_id)
+            relacionada = self.tabelas[nome].get(linha.get(f"{nome[:-1]}_id"))
+            saida[nome] = self._projetar(nome, relacionada, cols) if relacionada else None
+        return saida
+
+    def _preencher(self, tabela, linha):
+        agora = datetime.now(timezone.utc).isoformat()
+        linha.setdefault("created_at", agora)
+        linha["updated_at"] = agora
+        linha.setdefault("deleted_at", None)
+        if tabela == "agendamentos":
+            linha.setdefault("duracao_minutos", 60)
+        return linha
+
+    def _inserir(self, tabela, corpo):
+        novas = corpo if isinstance(corpo, list) else [corpo]
+        criadas = []
+        for linha in novas:
+            linha = self._preencher(tabela, dict(linha))
+            linha['id'] = self._proximo_id[tabela]
+            self._proximo_id[tabela] += 1
+            self.tabelas[tabela][linha['id']] = linha
+            criadas.append(linha)
+        return criadas
+
+    def _rpc(self, nome, corpo):
+        if nome == "alterar_status_agendamentos":
+            ids = set(corpo["ids"])
+            agendamentos = self._atualizar("agendamentos", [("deleted_at", "is.null")], {"status": corpo["novo_status"]},
+                                           lambda l: l['id'] in ids)
+            clientes = []
+            if corpo["novo_status"] == "realizado":
+                cliente_ids = {a['cliente_id'] for a in agendamentos}
+                clientes = self._atualizar("clientes", [("deleted_at", "is.null")],
+                                           {"ultimo_atendimento": datetime.now(timezone.utc).isoformat()},
+                                           lambda l: l['id'] in cliente_ids)
+            return {"agendamentos": agendamentos, "clientes": clientes}
+        if nome == "editar_serie_agendamentos":
+            alvo = self.tabelas["agendamentos"][corpo["ag_id"]]
+            escopo, serie = corpo["escopo"], alvo.get("serie_id")
+            inicio_alvo = _data_iso(alvo["data_hora"])
+
+            def alcancado(linha):
+                if linha['id'] == alvo['id']:
+                    return True
+                return (escopo != "este" and serie is not None and linha.get("serie_id") == serie
+                        and (escopo == "todos" or _data_iso(linha["data_hora"]) >= inicio_alvo))
+
+            alcancados = [l for l in self.tabelas["agendamentos"].values() if not l.get("deleted_at") and alcancado(l)]
+            alterados = []
+            for linha in alcancados:
+                mudancas = dict(corpo.get("alteracoes") or {})
+                mudancas["data_hora"] = (_data_iso(linha["data_hora"]) + timedelta(
+                    minutes=corpo.get("deslocamento_minutos") or 0)).isoformat()
+                if corpo.get("excluir"):
+                    mudancas["deleted_at"] = datetime.now(timezone.utc).isoformat()
+                linha.update(mudancas)
+                alterados.append(dict(self._preencher("agendamentos", linha)))
+            return alterados
+        raise KeyError(nome)
+
+    def _atualizar(self, tabela, params, corpo, filtro_extra=None):
+        filtros = [_filtro(c, v) for c, v in params if c not in ("select", "order", "offset", "limit")]
+        if filtro_extra:
+            filtros.append(filtro_extra)
+        alteradas = []
+        for linha in self.tabelas[tabela].values():
+            if all(f(linha) for f in filtros):
+                linha.update(corpo)
+                self._preencher(tabela, linha)
+                alteradas.append(dict(linha))
+        return alteradas
+
+    # ---------- servidor ----------
+
+    def iniciar(self):
+        estado = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive como no Supabase (o app usa um pool de conexões persistentes)
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, corpo, status=200, cabecalhos=None):
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                for chave, valor in (cabecalhos or {}).items():
+                    self.send_header(chave, valor)
+                self.end_headers()
+                self.wfile.write(dados)
+                with estado._lock:
+                    estado.requisicoes += 1
+                    estado.bytes_enviados += len(dados)
+
+            def _tabela(self):
+                url = urlsplit(self.path)
+                tabela = url.path.rsplit("/", 1)[-1]
+                return tabela, parse_qsl(url.query, keep_blank_values=True)
+
+            def _corpo(self):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                dados = self.rfile.read(tamanho)
+                with estado._lock:
+                    estado.bytes_recebidos += tamanho
+                return json.loads(dados or b"null")
+
+            def do_GET(self):
+                tabela, params = self._tabela()
+                self._corpo()  # o cliente manda "{}" também no GET
+                if tabela not in estado.tabelas:
+                    return self._responder({"message": f"tabela {tabela} não existe"}, 404)
+                with estado._lock:
+                    linhas, offset, total = estado._selecionar(tabela, params)
+                cabecalhos = {}
+                if "count=exact" in (self.headers.get("Prefer") or ""):
+                    fim = offset + len(linhas) - 1
+                    cabecalhos["Content-Range"] = f"{offset}-{fim}/{total}" if linhas else f"*/{total}"
+                self._responder(linhas, 200, cabecalhos)
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_POST(self):
+                tabela, _params = self._tabela()
+                corpo = self._corpo()
+                if "/rpc/" in self.path:
+                    with estado._lock:
+                        resultado = estado._rpc(tabela, corpo)
+                    return self._responder(resultado, 200)
+                with estado._lock:
+                    criadas = estado._inserir(tabela, corpo)
+                self._responder(criadas, 201)
+
+            def do_PATCH(self):
+                tabela, params = self._tabela()
+                corpo = self._corpo()
+                with estado._lock:
+                    alteradas = estado._atualizar(tabela, params, corpo)
+                self._responder(alteradas, 200)
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._servidor.serve_forever, name="postgrest-local", daemon=True).start()
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def parar(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+
+
+def _partes(select):
+    """Divide "a, b, clientes(nome, telefone)" nas vírgulas de primeiro nível."""
+    partes, nivel, atual = [], 0, ""
+    for ch in select:
+        if ch == "," and nivel == 0:
+            partes.append(atual.strip())
+            atual = ""
+            continue
+        nivel += ch == "("
+        nivel -= ch == ")"
+        atual += ch
+    if atual.strip():
+        partes.append(atual.strip())
+    return partes
@@ -0,0 +1,130 @@
+# Arquivo: benchmarks/verificar_notificacoes.py
+# Verificação da caixa de saída e do despachante contra um OneSignal local
+#
+# Uso (na raiz do projeto):
+#   python -m benchmarks.verificar_notificacoes
+#
+# Cada cenário usa uma caixa de saída nova (SQLite temporário) e um roteiro de
+# respostas do servidor local: lotes de até 2000 destinatários, nova tentativa em
+# 429/5xx (respeitando Retry-After), falha definitiva em 4xx, tentativas esgotadas e
+# a mesma chave de idempotência depois de perder o disco. Sai com código 1 se algum falhar.
+
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.onesignal_local import OneSignalLocal
+from notificacoes import MAX_TENTATIVAS, CaixaSaida, Despachante
+
+APP_ID = "app-local"
+
+
+def nova_caixa():
+    return CaixaSaida(os.path.join(tempfile.mkdtemp(), "notificacoes.sqlite3"))
+
+
+def esvaziar(caixa, servidor, url, prazo=15):
+    """Envia até não restar envio pendente (esperando as novas tentativas agendadas)."""
+    despachante = Despachante(caixa, requests.Session(), APP_ID, servidor.rest_key, url,
+                              atraso_base=0.05, atraso_maximo=2.0)
+    limite = time.time() + prazo
+    while time.time() < limite:
+        envios = caixa.proximos()
+        for envio in envios:
+            despachante.enviar(envio)
+        if not envios and caixa.proxima_tentativa_em() is None:
+            return
+        time.sleep(0.02)
+    raise TimeoutError("caixa de saída não esvaziou no prazo")
+
+
+def envios(caixa):
+    with caixa._lock:
+        return [dict(l) for l in caixa._conn.execute("SELECT * FROM envios ORDER BY id")]
+
+
+def cenario_lotes(servidor, url):
+    caixa = nova_caixa()
+    caixa.enfileirar("Aviso", "Teste", destinatarios=[f"sub-{i}" for i in range(4500)], chave="lotes")
+    esvaziar(caixa, servidor, url)
+    tamanhos = [len(r["corpo"]["include_subscription_ids"]) for r in servidor.requisicoes]
+    chaves = {r["corpo"]["idempotency_key"] for r in servidor.requisicoes}
+    return (tamanhos == [2000, 2000, 500] and len(chaves) == 3
+            and [e["status"] for e in envios(caixa)] == ["enviado"] * 3), f"lotes {tamanhos}"
+
+
+def cenario_429(servidor, url):
+    caixa = nova_caixa()
+    servidor.responder_com((429, {"Retry-After": "1"}))
+    caixa.enfileirar("Aviso", "Teste")
+    esvaziar(caixa, servidor, url)
+    espera = servidor.requisicoes[1]["em"] - servidor.requisicoes[0]["em"]
+    envio = envios(caixa)[0]
+    return (len(servidor.requisicoes) == 2 and espera >= 0.9 and envio["status"] == "enviado"
+            and envio["tentativas"] == 2), f"429 + Retry-After: 1 → nova tentativa após {espera:.2f}s"
+
+
+def cenario_5xx(servidor, url):
+    caixa = nova_caixa()
+    servidor.responder_com((503, {}), (502, {}))
+    caixa.enfileirar("Aviso", "Teste")
+    esvaziar(caixa, servidor, url)
+    status = [r["status"] for r in servidor.requisicoes]
+    chaves = {r["corpo"]["idempotency_key"] for r in servidor.requisicoes}
+    return (status == [503, 502, 200] and len(chaves) == 1
+            and envios(caixa)[0]["status"] == "enviado"), f"5xx com recuo exponencial {status}, mesma chave"
+
+
+def cenario_4xx(servidor, url):
+    caixa = nova_caixa()
+    servidor.responder_com((400, {}))
+    caixa.enfileirar("Aviso", "Teste")
+    esvaziar(caixa, servidor, url)
+    envio = envios(caixa)[0]
+    return (len(servidor.requisicoes) == 1 and envio["status"] == "falhou"
+            and envio["erro"].startswith("HTTP 400")), f"4xx sem nova tentativa ({envio['erro'][:40]})"
+
+
+def cenario_esgotado(servidor, url):
+    caixa = nova_caixa()
+    servidor.responder_com(*[(500, {})] * (MAX_TENTATIVAS + 1))
+    caixa.enfileirar("Aviso", "Teste")
+    esvaziar(caixa, servidor, url)
+    return (len(servidor.requisicoes) == MAX_TENTATIVAS and envios(caixa)[0]["status"] == "falhou"), \
+        f"5xx em todas: falhou após {len(servidor.requisicoes)} tentativas"
+
+
+def cenario_reinicio(servidor, url):
+    # Mesmo disparo enfileirado em duas caixas (o disco do processo anterior se perdeu)
+    for _ in range(2):
+        caixa = nova_caixa()
+        caixa.enfileirar("🎂 Aniversário", "Hoje é aniversário de Ana!", chave="aniversario:1:2026")
+        esvaziar(caixa, servidor, url)
+    chaves = {r["corpo"]["idempotency_key"] for r in servidor.requisicoes}
+    return (len(servidor.requisicoes) == 2 and len(chaves) == 1 and len(servidor.notificacoes) == 1), \
+        "reinício sem disco: mesma idempotency_key, uma notificação no OneSignal"
+
+
+CENARIOS = [cenario_lotes, cenario_429, cenario_5xx, cenario_4xx, cenario_esgotado, cenario_reinicio]
+
+
+def main():
+    falhas = 0
+    for cenario in CENARIOS:
+        servidor = OneSignalLocal()
+        try:
+            ok, descricao = cenario(servidor, servidor.iniciar())
+        except Exception as e:
+            ok, descricao = False, f"{cenario.__name__}: {e!r}"
+        finally:
+            servidor.parar()
+        falhas += not ok
+        print(f"{'ok     ' if ok else 'FALHOU '} {descricao}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
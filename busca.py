@@ -0,0 +1,114 @@
+# Arquivo: busca.py
+# Busca de clientes por nome (sem acento, minúsculo) ou por dígitos do telefone
+#
+# Índice em memória por trigramas: "11912345678" encontra "(11) 91234-5678" e
+# "jose" encontra "José". Atualizado incrementalmente a cada cadastro/edição/exclusão.
+
+import threading
+import unicodedata
+from collections import defaultdict
+
+
+def somente_digitos(tel):
+    return ''.join(filter(str.isdigit, str(tel or "")))
+
+
+def normalizar_texto(texto):
+    """Minúsculo, sem acentos e com espaços simples: "  Maria  José " → "maria jose"."""
+    decomposto = unicodedata.normalize("NFKD", str(texto or ""))
+    sem_acento = ''.join(ch for ch in decomposto if not unicodedata.combining(ch))
+    return ' '.join(sem_acento.casefold().split())
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusca:
+    """Índice de clientes para busca por substring do nome ou do telefone."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entradas = {}
+        self._tri_nome = defaultdict(set)
+        self._tri_telefone = defaultdict(set)
+        self._ordenados = []
+        self._ordem_suja = False
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def carregar(self, clientes):
+        with self._lock:
+            self._entradas.clear()
+            self._tri_nome.clear()
+            self._tri_telefone.clear()
+            for cliente in clientes:
+                self._adicionar(cliente)
+            self._ordem_suja = True
+
+    def atualizar(self, cliente):
+        with self._lock:
+            self._remover(cliente['id'])
+            self._adicionar(cliente)
+            self._ordem_suja = True
+
+    def remover(self, cliente_id):
+        with self._lock:
+            self._remover(cliente_id)
+            self._ordem_suja = True
+
+    def buscar(self, termo, limite=20):
+        """Clientes cujo nome ou telefone contém `termo`, começos de nome primeiro."""
+        nome = normalizar_texto(termo)
+        digitos = somente_digitos(termo)
+        # Termo só com números e pontuação de telefone: busca pelos dígitos
+        por_telefone = bool(digitos) and not any(ch.isalpha() for ch in nome)
+        alvo = digitos if por_telefone else nome
+        campo = 1 if por_telefone else 0
+        trigramas = self._tri_telefone if por_telefone else self._tri_nome
+        with self._lock:
+            if not alvo:
+                return [self._entradas[i][2] for i in self._ordem()[:limite]]
+            if len(alvo) < 3:
+                # Termos curtos não têm trigramas: percorre em ordem alfabética e para no limite
+                resultado = []
+                for cliente_id in self._ordem():
+                    if alvo in self._entradas[cliente_id][campo]:
+                        resultado.append(self._entradas[cliente_id][2])
+                        if len(resultado) >= limite:
+                            break
+                return resultado
+
+            conjuntos = sorted((trigramas.get(t, set()) for t in _trigramas(alvo)), key=len)
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:]) if conjuntos else set()
+            encontrados = [self._entradas[i] for i in candidatos if alvo in self._entradas[i][campo]]
+            encontrados.sort(key=lambda e: (not e[campo].startswith(alvo), e[0]))
+            return [e[2] for e in encontrados[:limite]]
+
+    def _ordem(self):
+        if self._ordem_suja:
+            self._ordenados = sorted(self._entradas, key=lambda i: self._entradas[i][0])
+            self._ordem_suja = False
+        return self._ordenados
+
+    def _adicionar(self, cliente):
+        nome = normalizar_texto(cliente.get('nome'))
+        digitos = somente_digitos(cliente.get('telefone'))
+        self._entradas[cliente['id']] = (nome, digitos, cliente)
+        for t in _trigramas(nome):
+            self._tri_nome[t].add(cliente['id'])
+        for t in _trigramas(digitos):
+            self._tri_telefone[t].add(cliente['id'])
+
+    def _remover(self, cliente_id):
+        entrada = self._entradas.pop(cliente_id, None)
+        if entrada is None:
+            return
+        for indice, texto in ((self._tri_nome, entrada[0]), (self._tri_telefone, entrada[1])):
+            for t in _trigramas(texto):
+                ids = indice.get(t)
+                if ids is not None:
+                    ids.discard(cliente_id)
+                    if not ids:
+                        del indice[t]
@@ -0,0 +1,104 @@
+# Arquivo: cache.py
+# Cache em memória com versão por tabela (e por chave, ex.: mês dos agendamentos)
+#
+# Cada escrita invalida só o que tocou: invalidar("agendamentos", "2026-10") torna
+# obsoletas as leituras que dependem daquele mês (e as que dependem da tabela inteira),
+# mas mantém em cache os outros meses e as outras tabelas.
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+# Versão que muda a cada escrita na tabela, qualquer que seja a chave
+TABELA_TODA = "*"
+# Versão que muda só quando a tabela inteira é invalidada (sem chave)
+GERAL = ""
+
+
+class CacheVersionado:
+    """Memoização compartilhada entre sessões, invalidada por versão de tabela/chave.
+
+    Os valores são devolvidos sem cópia: quem lê não deve modificá-los.
+    """
+
+    def __init__(self, max_entradas=512):
+        self._lock = threading.RLock()
+        self._versoes = Counter()
+        self._entradas = OrderedDict()
+        self._max_entradas = max_entradas
+        self.hits = Counter()
+        self.misses = Counter()
+        # Segundos gastos recalculando (misses), para achar o loader que pesa no rerun
+        self.tempo_calculo = Counter()
+
+    def versao(self, tabela, chave=None):
+        with self._lock:
+            if chave is None:
+                return self._versoes[(tabela, TABELA_TODA)]
+            return (self._versoes[(tabela, GERAL)], self._versoes[(tabela, chave)])
+
+    def invalidar(self, tabela, *chaves):
+        """Sem chaves invalida a tabela inteira; com chaves, só as leituras dessas chaves."""
+        with self._lock:
+            self._versoes[(tabela, TABELA_TODA)] += 1
+            if not chaves:
+                self._versoes[(tabela, GERAL)] += 1
+            for chave in chaves:
+                self._versoes[(tabela, chave)] += 1
+
+    def memoizar(self, *tabelas, ttl=None, chaves=None):
+        """Decorador. `chaves(*args, **kwargs)` devolve as chaves lidas (vale para todas as `tabelas`);
+        se devolver None, a leitura depende da tabela inteira."""
+        def decorador(func):
+            nome = func.__qualname__
+
+            def versoes(args, kwargs):
+                if chaves is None:
+                    return tuple(self.versao(t) for t in tabelas)
+                lidas = chaves(*args, **kwargs)
+                if lidas is None:
+                    return tuple(self.versao(t) for t in tabelas)
+                return tuple(self.versao(t, c) for t in tabelas for c in lidas)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                chave = (func.__module__, nome, args, tuple(sorted(kwargs.items())))
+                atual = versoes(args, kwargs)
+                agora = time.monotonic()
+                with self._lock:
+                    entrada = self._entradas.get(chave)
+                    if entrada and entrada[0] == atual and (entrada[1] is None or entrada[1] > agora):
+                        self._entradas.move_to_end(chave)
+                        self.hits[nome] += 1
+                        return entrada[2]
+                    self.misses[nome] += 1
+
+                inicio = time.perf_counter()
+                valor = func(*args, **kwargs)
+                with self._lock:
+                    self.tempo_calculo[nome] += time.perf_counter() - inicio
+                    self._entradas[chave] = (atual, agora + ttl if ttl else None, valor)
+                    self._entradas.move_to_end(chave)
+                    while len(self._entradas) > self._max_entradas:
+                        self._entradas.popitem(last=False)
+                return valor
+
+            return wrapper
+        return decorador
+
+    def estatisticas(self):
+        """Hits e misses por função, para conferir a economia do cache."""
+        with self._lock:
+            nomes = sorted(set(self.hits) | set(self.misses))
+            linhas = []
+            for nome in nomes:
+                total = self.hits[nome] + self.misses[nome]
+                linhas.append({
+                    "funcao": nome,
+                    "hits": self.hits[nome],
+                    "misses": self.misses[nome],
+                    "taxa_acerto": round(self.hits[nome] / total, 3) if total else 0.0,
+                    "tempo_calculo_ms": round(self.tempo_calculo[nome] * 1000, 1),
+                })
+            return linhas
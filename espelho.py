@@ -0,0 +1,59 @@
+# Arquivo: espelho.py
+# Espelho em disco (SQLite) da cópia local de clientes e agendamentos
+#
+# Na partida o app carrega o espelho e já renderiza com os dados da última
+# execução; a sincronização com o Supabase continua em segundo plano e grava
+# cada alteração aqui. Sem rede, o app segue em modo somente leitura com estes dados.
+
+import json
+import sqlite3
+import threading
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS linhas (
+    tabela TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    dados TEXT NOT NULL,
+    PRIMARY KEY (tabela, id)
+);
+CREATE TABLE IF NOT EXISTS marcas (
+    tabela TEXT PRIMARY KEY,
+    marca TEXT
+);
+"""
+
+
+class EspelhoLocal:
+
+    def __init__(self, caminho):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(ESQUEMA)
+
+    def carregar(self, tabela):
+        """(linhas, marca) salvas da tabela; ([], None) se o espelho ainda está vazio."""
+        with self._lock:
+            linhas = [json.loads(d) for (d,) in self._conn.execute(
+                "SELECT dados FROM linhas WHERE tabela = ?", (tabela,))]
+            marca = self._conn.execute("SELECT marca FROM marcas WHERE tabela = ?", (tabela,)).fetchone()
+        return linhas, marca[0] if marca else None
+
+    def salvar(self, tabela, alteracoes, marca=None):
+        """Grava as alterações [(antes, depois)] e, se informada, a nova marca, numa transação."""
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO linhas (tabela, id, dados) VALUES (?, ?, ?)",
+                    [(tabela, depois['id'], json.dumps(depois)) for _antes, depois in alteracoes if depois])
+                self._conn.executemany(
+                    "DELETE FROM linhas WHERE tabela = ? AND id = ?",
+                    [(tabela, antes['id']) for antes, depois in alteracoes if depois is None])
+                if marca is not None:
+                    self._conn.execute("INSERT OR REPLACE INTO marcas (tabela, marca) VALUES (?, ?)", (tabela, marca))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
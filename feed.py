@@ -0,0 +1,244 @@
+# Arquivo: feed.py
+# Feed somente leitura da agenda (iCalendar e JSON) para apps de calendário
+#
+# App WSGI separado do Streamlit (na Vercel: rota /feed/...; localmente: python feed.py).
+# Mantém a própria cópia local sincronizada por delta (sincronizacao.py), então cada
+# consulta custa no máximo uma busca de alterações, nunca uma leitura da tabela toda.
+# Sem DADOS_DIR gravável (na Vercel só /tmp aceita escrita) a cópia vai para a pasta
+# temporária e, se nem ela servir, fica só em memória. O /tmp não sobrevive entre
+# instâncias: cada partida a frio refaz a sincronização completa das tabelas.
+# O corpo gerado fica em cache por versão dos dados e janela de datas; o ETag é o hash
+# do corpo e um If-None-Match igual responde 304 sem gerar nada.
+#
+#   GET /feed/agenda.ics?token=...&inicio=2026-10-01&fim=2026-12-31
+#   GET /feed/agenda.json?token=...
+
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import parse_qs
+
+from cache import CacheVersionado
+from espelho import EspelhoLocal
+from modelos import TZ_BRASIL, Agendamento, chave_mes
+from recursos import carregar_configuracao, criar_supabase
+from sincronizacao import Sincronizador, buscador_supabase
+
+# Janela padrão (dias antes e depois de hoje) e a maior janela aceita
+DIAS_ANTES = 30
+DIAS_DEPOIS = 180
+MAX_DIAS = 400
+FORMATOS = {"ics": "text/calendar; charset=utf-8", "json": "application/json; charset=utf-8"}
+STATUS_ICS = {"nao_confirmado": "TENTATIVE", "confirmado": "CONFIRMED", "realizado": "CONFIRMED", "cancelado": "CANCELLED"}
+
+_lock = threading.Lock()
+_estado = {}
+cache = CacheVersionado(max_entradas=64)
+
+
+def _espelho(config):
+    """Cópia em disco em DADOS_DIR ou, se a pasta não puder ser criada, na pasta temporária; None sem nenhuma."""
+    for pasta in (config.dados_dir, tempfile.gettempdir()):
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            return EspelhoLocal(os.path.join(pasta, "feed.sqlite3"))
+        except (OSError, sqlite3.Error):
+            continue
+    return None
+
+
+def _iniciar():
+    """Configuração, cópia local e cache criados na primeira requisição do processo."""
+    with _lock:
+        if not _estado:
+            config = carregar_configuracao()
+            sincronizador = Sincronizador(buscador_supabase(criar_supabase(config)),
+                                          espelho=_espelho(config),
+                                          particoes={"agendamentos": lambda r: chave_mes(r['data_hora'])})
+            if sincronizador.espelho is not None:
+                sincronizador.carregar_espelho()
+            sincronizador.assinar(lambda tabela, _alteracoes: cache.invalidar(tabela))
+            _estado.update(config=config, sincronizador=sincronizador)
+    return _estado['config'], _estado['sincronizador']
+
+
+def _sincronizar(config, sincronizador):
+    """Busca o delta se a última busca tem mais de SYNC_INTERVALO segundos."""
+    with _lock:
+        if sincronizador.ultima_sincronizacao and time.time() - sincronizador.ultima_sincronizacao < config.sync_intervalo:
+            return
+        try:
+            sincronizador.atualizar()
+        except Exception:
+            if not sincronizador.pronto:
+                raise  # sem cópia local não há o que servir
+
+
+def _ultima_alteracao(sincronizador):
+    marcas = [sincronizador.marca(t) for t in sincronizador.tabelas]
+    datas = [datetime.fromisoformat(m) for m in marcas if m]
+    return max(datas).astimezone(timezone.utc).replace(microsecond=0) if datas else datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def _agendamentos(sincronizador, inicio, fim):
+    """Agendamentos com início em [inicio, fim) no horário de Brasília, em ordem de horário."""
+    limite_inicio = datetime.combine(inicio, datetime.min.time(), TZ_BRASIL)
+    limite_fim = datetime.combine(fim, datetime.min.time(), TZ_BRASIL)
+    ags = []
+    linhas = sincronizador.linhas_particoes("agendamentos", limite_inicio.strftime("%Y-%m"), limite_fim.strftime("%Y-%m"))
+    for registro in linhas:
+        if limite_inicio <= datetime.fromisoformat(registro['data_hora']) < limite_fim:
+            cliente = sincronizador.obter("clientes", registro['cliente_id']) or {}
+            ags.append(Agendamento.de_registro({**registro, "clientes": cliente}))
+    ags.sort(key=lambda ag: (ag.inicio, ag.id))
+    return ags
+
+
+def _texto_ics(texto):
+    return (str(texto).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _dobrar(linha):
+    """Quebra em linhas de até 75 bytes (RFC 5545), sem partir caracteres UTF-8."""
+    partes, atual = [], ""
+    for ch in linha:
+        if len((atual + ch).encode()) > (75 if not partes else 74):
+            partes.append(atual)
+            atual = ""
+        atual += ch
+    partes.append(atual)
+    return "\r\n ".join(partes)
+
+
+def _utc_ics(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def gerar_ics(ags, modificado):
+    linhas = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Depilacao Claudia Ferraz//Agenda//PT-BR",
+              "CALSCALE:GREGORIAN", "METHOD:PUBLISH", "X-WR-CALNAME:Depilação Claudia Ferraz",
+              "X-WR-TIMEZONE:America/Sao_Paulo"]
+    for ag in ags:
+        descricao = "\n".join(filter(None, [ag.cliente_telefone, ag.observacoes]))
+        linhas += [
+            "BEGIN:VEVENT",
+            f"UID:agendamento-{ag.id}@depilacao-claudia-ferraz",
+            f"DTSTAMP:{_utc_ics(modificado)}",
+            f"DTSTART:{_utc_ics(ag.inicio)}",
+            f"DTEND:{_utc_ics(ag.fim)}",
+            f"SUMMARY:{_texto_ics(f'{ag.cliente_nome} ({ag.info.texto})')}",
+            f"STATUS:{STATUS_ICS.get(ag.status, 'TENTATIVE')}",
+        ]
+        if descricao:
+            linhas.append(f"DESCRIPTION:{_texto_ics(descricao)}")
+        linhas.append("END:VEVENT")
+    linhas.append("END:VCALENDAR")
+    return "".join(_dobrar(l) + "\r\n" for l in linhas)
+
+
+def gerar_json(ags, inicio, fim):
+    return json.dumps({
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "agendamentos": [{
+            "id": ag.id,
+            "cliente_id": ag.cliente_id,
+            "cliente": ag.cliente_nome,
+            "telefone": ag.cliente_telefone,
+            "inicio": ag.inicio.isoformat(),
+            "fim": ag.fim.isoformat(),
+            "duracao_minutos": ag.duracao,
+            "status": ag.status,
+            "status_texto": ag.info.texto,
+            "observacoes": ag.observacoes,
+        } for ag in ags],
+    }, ensure_ascii=False)
+
+
+@cache.memoizar("agendamentos", "clientes")
+def gerar(formato, inicio, fim):
+    """(corpo, ETag, Last-Modified) da janela; refeito só quando a cópia local muda."""
+    sincronizador = _estado['sincronizador']
+    modificado = _ultima_alteracao(sincronizador)
+    ags = _agendamentos(sincronizador, inicio, fim)
+    corpo = (gerar_ics(ags, modificado) if formato == "ics" else gerar_json(ags, inicio, fim)).encode()
+    return corpo, '"' + hashlib.sha256(corpo).hexdigest()[:32] + '"', modificado
+
+
+def _janela(params):
+    hoje = datetime.now(TZ_BRASIL).date()
+    inicio = date.fromisoformat(params["inicio"][0]) if "inicio" in params else hoje - timedelta(days=DIAS_ANTES)
+    fim = date.fromisoformat(params["fim"][0]) if "fim" in params else hoje + timedelta(days=DIAS_DEPOIS)
+    if not 0 < (fim - inicio).days <= MAX_DIAS:
+        raise ValueError(f"janela deve ter entre 1 e {MAX_DIAS} dias")
+    return inicio, fim
+
+
+def _nao_modificado(environ, etag, modificado):
+    pedidos = environ.get("HTTP_IF_NONE_MATCH")
+    if pedidos is not None:
+        return pedidos.strip() == "*" or etag in [p.strip() for p in pedidos.split(",")]
+    desde = environ.get("HTTP_IF_MODIFIED_SINCE")
+    if desde:
+        try:
+            return modificado <= parsedate_to_datetime(desde)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def app(environ, start_response):
+    def responder(status, corpo=b"", cabecalhos=()):
+        if isinstance(corpo, str):
+            corpo = corpo.encode()
+        cabecalhos = list(cabecalhos)
+        if corpo or status.startswith("200"):
+            cabecalhos.append(("Content-Length", str(len(corpo))))
+        start_response(status, cabecalhos)
+        return [] if environ["REQUEST_METHOD"] == "HEAD" else [corpo]
+
+    texto = [("Content-Type", "text/plain; charset=utf-8")]
+    if environ["REQUEST_METHOD"] not in ("GET", "HEAD"):
+        return responder("405 Method Not Allowed", "método não permitido", texto + [("Allow", "GET, HEAD")])
+    nome = environ.get("PATH_INFO", "").rstrip("/").rsplit("/", 1)[-1]
+    formato = nome.rsplit(".", 1)[-1] if nome.startswith("agenda.") else None
+    if formato not in FORMATOS:
+        return responder("404 Not Found", "use /feed/agenda.ics ou /feed/agenda.json", texto)
+
+    config, sincronizador = _iniciar()
+    params = parse_qs(environ.get("QUERY_STRING", ""))
+    if not config.feed_token:
+        return responder("404 Not Found", "feed desativado (defina FEED_TOKEN)", texto)
+    if not hmac.compare_digest(params.get("token", [""])[0].encode(), config.feed_token.encode()):
+        return responder("403 Forbidden", "token inválido", texto)
+    try:
+        inicio, fim = _janela(params)
+    except ValueError as e:
+        return responder("400 Bad Request", f"janela inválida: {e}", texto)
+
+    try:
+        _sincronizar(config, sincronizador)
+    except Exception:
+        return responder("503 Service Unavailable", "banco indisponível", texto + [("Retry-After", "60")])
+    corpo, etag, modificado = gerar(formato, inicio, fim)
+    cabecalhos = [("ETag", etag), ("Last-Modified", format_datetime(modificado, usegmt=True)),
+                  ("Cache-Control", "private, no-cache")]
+    if _nao_modificado(environ, etag, modificado):
+        return responder("304 Not Modified", b"", cabecalhos)
+    return responder("200 OK", corpo, cabecalhos + [("Content-Type", FORMATOS[formato])])
+
+
+if __name__ == "__main__":
+    from wsgiref.simple_server import make_server
+
+    porta = int(os.getenv("FEED_PORTA", "8090"))
+    print(f"Feed em http://localhost:{porta}/feed/agenda.ics")
+    make_server("", porta, app).serve_forever()
@@ -0,0 +1,230 @@
+# Arquivo: importacao.py
+# Importação em massa de clientes (CSV/XLSX) e exportação em CSV, em blocos
+#
+# A planilha é lida em blocos de linhas, sem carregar o arquivo inteiro num DataFrame.
+# Cada linha é validada e normalizada, telefones repetidos (na planilha ou já
+# cadastrados) são descartados, e as válidas vão ao banco num insert de várias linhas
+# por bloco. A exportação percorre a tabela por páginas (id crescente) e escreve
+# direto no arquivo.
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from busca import normalizar_texto, somente_digitos
+
+TAMANHO_BLOCO = 500
+COLUNAS_CLIENTES = ("nome", "telefone", "data_nascimento", "observacoes")
+# Cabeçalhos aceitos na planilha (sem acento, minúsculos) → coluna
+SINONIMOS = {
+    "nome": "nome", "nome completo": "nome", "cliente": "nome",
+    "telefone": "telefone", "celular": "telefone", "whatsapp": "telefone", "fone": "telefone",
+    "data_nascimento": "data_nascimento", "data de nascimento": "data_nascimento",
+    "nascimento": "data_nascimento", "aniversario": "data_nascimento",
+    "observacoes": "observacoes", "observacao": "observacoes", "obs": "observacoes",
+}
+FORMATOS_DATA = ("%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d.%m.%Y")
+AMOSTRA_CSV = 64 * 1024
+
+
+def chave_telefone(tel):
+    """Dígitos do telefone sem o +55: chave para achar cadastros repetidos."""
+    digitos = somente_digitos(tel)
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    return digitos
+
+
+def normalizar_telefone(tel):
+    """"(11) 91234-5678" ou "(11) 3123-4567" a partir de qualquer grafia; None se não for um telefone."""
+    digitos = chave_telefone(tel)
+    if len(digitos) == 11:
+        return f"({digitos[:2]}) {digitos[2:7]}-{digitos[7:]}"
+    if len(digitos) == 10:
+        return f"({digitos[:2]}) {digitos[2:6]}-{digitos[6:]}"
+    return None
+
+
+def normalizar_data(valor):
+    """Data ISO ("1990-05-17") a partir de date/datetime, ISO ou dd/mm/aaaa; None se vazia."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    if not isinstance(valor, date):
+        texto = str(valor).strip()
+        if not texto:
+            return None
+        try:
+            valor = date.fromisoformat(texto[:10])
+        except ValueError:
+            for formato in FORMATOS_DATA:
+                try:
+                    valor = datetime.strptime(texto, formato).date()
+                    break
+                except ValueError:
+                    pass
+            else:
+                raise ValueError(f"data inválida: {texto}")
+    if not date(1900, 1, 1) <= valor <= date.today():
+        raise ValueError(f"data fora do intervalo: {valor.strftime('%d/%m/%Y')}")
+    return valor.isoformat()
+
+
+def normalizar_cliente(linha):
+    """Linha da planilha → registro de `clientes`; None se a linha está vazia. ValueError se inválida."""
+    nome = ' '.join(str(linha.get("nome") or "").split())
+    telefone_bruto = str(linha.get("telefone") or "").strip()
+    observacoes = str(linha.get("observacoes") or "").strip()
+    if not (nome or telefone_bruto or observacoes or linha.get("data_nascimento")):
+        return None
+    if not nome:
+        raise ValueError("nome vazio")
+    telefone = normalizar_telefone(telefone_bruto)
+    if telefone is None:
+        raise ValueError(f"telefone inválido: {telefone_bruto or 'vazio'}")
+    return {
+        "nome": nome,
+        "telefone": telefone,
+        "data_nascimento": normalizar_data(linha.get("data_nascimento")),
+        "observacoes": observacoes or None,
+    }
+
+
+def _mapear_cabecalho(cabecalho):
+    colunas = [SINONIMOS.get(normalizar_texto(c)) for c in cabecalho]
+    faltando = [c for c in ("nome", "telefone") if c not in colunas]
+    if faltando:
+        raise ValueError(f"planilha sem a(s) coluna(s): {', '.join(faltando)}")
+    return colunas
+
+
+def _blocos(linhas, colunas, tamanho_bloco, progresso):
+    """Agrupa as linhas em blocos de (número da linha na planilha, {coluna: valor})."""
+    bloco = []
+    for numero, valores in enumerate(linhas, start=2):
+        bloco.append((numero, {c: v for c, v in zip(colunas, valores) if c}))
+        if len(bloco) >= tamanho_bloco:
+            yield bloco, progresso()
+            bloco = []
+    yield bloco, 1.0
+
+
+def _codificacao(amostra):
+    # Planilhas salvas pelo Excel em português costumam vir em cp1252
+    try:
+        amostra.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        return "utf-8-sig" if e.start >= len(amostra) - 3 else "cp1252"
+
+
+def ler_csv(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """Blocos de linhas de um CSV (separador e codificação detectados) com a fração já lida."""
+    tamanho = arquivo.seek(0, io.SEEK_END) or 1
+    arquivo.seek(0)
+    amostra = arquivo.read(AMOSTRA_CSV)
+    arquivo.seek(0)
+    texto = io.TextIOWrapper(arquivo, encoding=_codificacao(amostra), newline="")
+    try:
+        dialeto = csv.Sniffer().sniff(amostra.decode("latin-1").split("\n", 1)[0], delimiters=",;\t|")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(texto, dialeto)
+    try:
+        colunas = _mapear_cabecalho(next(leitor, []))
+        yield from _blocos(leitor, colunas, tamanho_bloco, lambda: min(arquivo.tell() / tamanho, 1.0))
+    finally:
+        texto.detach()
+
+
+def ler_xlsx(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """Blocos de linhas da primeira aba de um XLSX (modo read_only: lê a aba em fluxo)."""
+    from openpyxl import load_workbook  # só necessário para .xlsx
+
+    pasta = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        aba = pasta.worksheets[0]
+        total = aba.max_row or 1
+        linhas = aba.iter_rows(values_only=True)
+        colunas = _mapear_cabecalho(["" if c is None else str(c) for c in next(linhas, ())])
+        lidas = _blocos(linhas, colunas, tamanho_bloco, lambda: 0.0)
+        for bloco, _fracao in lidas:
+            yield bloco, min(bloco[-1][0] / total, 1.0) if bloco else 1.0
+    finally:
+        pasta.close()
+
+
+def ler_planilha(arquivo, nome_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    if nome_arquivo.lower().endswith(".xlsx"):
+        return ler_xlsx(arquivo, tamanho_bloco)
+    return ler_csv(arquivo, tamanho_bloco)
+
+
+@dataclass
+class ResultadoImportacao:
+    lidas: int = 0
+    inseridas: int = 0
+    duplicadas: int = 0
+    problemas: list = field(default_factory=list)  # [(linha, motivo)]
+
+    def relatorio_csv(self):
+        saida = io.StringIO()
+        escritor = csv.writer(saida, delimiter=";")
+        escritor.writerow(["linha", "motivo"])
+        escritor.writerows(self.problemas)
+        return saida.getvalue()
+
+
+def importar_clientes(blocos, telefones_existentes, inserir, ao_progredir=None):
+    """Valida, descarta repetidos e chama `inserir(lote)` uma vez por bloco.
+
+    `telefones_existentes` são as chaves (chave_telefone) já cadastradas; um bloco
+    que o banco recusar entra inteiro no relatório e a importação continua.
+    """
+    vistos = set(telefones_existentes)
+    resultado = ResultadoImportacao()
+    for bloco, fracao in blocos:
+        lote = []
+        for numero, linha in bloco:
+            try:
+                cliente = normalizar_cliente(linha)
+            except ValueError as e:
+                resultado.lidas += 1
+                resultado.problemas.append((numero, str(e)))
+                continue
+            if cliente is None:
+                continue
+            resultado.lidas += 1
+            chave = chave_telefone(cliente['telefone'])
+            if chave in vistos:
+                resultado.duplicadas += 1
+                resultado.problemas.append((numero, f"telefone repetido: {cliente['telefone']}"))
+                continue
+            vistos.add(chave)
+            lote.append((numero, cliente))
+        if lote:
+            try:
+                inserir([cliente for _numero, cliente in lote])
+                resultado.inseridas += len(lote)
+            except Exception:
+                resultado.problemas.extend((numero, "erro ao gravar no banco") for numero, _c in lote)
+        if ao_progredir:
+            ao_progredir(fracao, resultado)
+    return resultado
+
+
+def exportar_csv(destino, buscar_pagina, colunas, converter=None, tamanho_pagina=1000):
+    """Escreve a tabela em `destino` página a página; `buscar_pagina(apos_id, limite)`
+    devolve as linhas seguintes em ordem de id. Retorna o total de linhas escritas."""
+    escritor = csv.DictWriter(destino, fieldnames=colunas, delimiter=";", extrasaction="ignore")
+    escritor.writeheader()
+    ultimo, total = None, 0
+    while True:
+        pagina = buscar_pagina(ultimo, tamanho_pagina)
+        escritor.writerows(map(converter, pagina) if converter else pagina)
+        total += len(pagina)
+        if len(pagina) < tamanho_pagina:
+            return total
+        ultimo = pagina[-1]['id']
@@ -0,0 +1,86 @@
+# Arquivo: intervalos.py
+# Índice de ocupação da agenda: conflito de horário e próximos horários livres
+#
+# Os agendamentos ficam em arrays ordenados pelo início, com o maior fim acumulado
+# (prefixo). Os conflitos saem de uma busca binária; os horários livres saltam
+# de bloco ocupado em bloco ocupado, também por busca binária.
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+
+def _arredondar(momento, passo):
+    """Arredonda para cima no múltiplo de `passo` (a partir da meia-noite)."""
+    meia_noite = momento.replace(hour=0, minute=0, second=0, microsecond=0)
+    resto = (momento - meia_noite) % passo
+    return momento if not resto else momento + (passo - resto)
+
+
+class IndiceIntervalos:
+    """Intervalos [inicio, fim) com identificador; imutável depois de criado."""
+
+    def __init__(self, intervalos):
+        self._itens = sorted(intervalos, key=lambda i: (i[0], i[1]))
+        self._inicios = [i[0] for i in self._itens]
+        self._max_fim = []
+        maior = None
+        for _inicio, fim, _id in self._itens:
+            maior = fim if maior is None or fim > maior else maior
+            self._max_fim.append(maior)
+
+        # Blocos ocupados já mesclados, para a busca de horários livres
+        blocos = []
+        for inicio, fim, _id in self._itens:
+            if blocos and inicio <= blocos[-1][1]:
+                blocos[-1][1] = max(blocos[-1][1], fim)
+            else:
+                blocos.append([inicio, fim])
+        self._blocos_inicio = [b[0] for b in blocos]
+        self._blocos_fim = [b[1] for b in blocos]
+
+    def __len__(self):
+        return len(self._itens)
+
+    def conflitos(self, inicio, fim, ignorar=()):
+        """Ids dos intervalos que se sobrepõem a [inicio, fim)."""
+        # Só quem começa antes de `fim` pode sobrepor; entre esses, basta o maior fim passar de `inicio`
+        j = bisect_left(self._inicios, fim) - 1
+        encontrados = []
+        while j >= 0 and self._max_fim[j] > inicio:
+            ini, fi, ident = self._itens[j]
+            if fi > inicio and ident not in ignorar:
+                encontrados.append(ident)
+            j -= 1
+        encontrados.reverse()
+        return encontrados
+
+    def _livre(self, inicio, fim):
+        """Se [inicio, fim) bate num bloco ocupado, devolve o fim desse bloco; senão None."""
+        k = bisect_right(self._blocos_inicio, inicio) - 1
+        if k >= 0 and self._blocos_fim[k] > inicio:
+            return self._blocos_fim[k]
+        k += 1
+        if k < len(self._blocos_inicio) and self._blocos_inicio[k] < fim:
+            return self._blocos_fim[k]
+        return None
+
+    def proximos_livres(self, a_partir, duracao, quantidade=5, dias=7,
+                        abertura=time(8, 0), fechamento=time(21, 0), passo=timedelta(minutes=30)):
+        """Próximos inícios livres para `duracao`, dentro do horário de funcionamento."""
+        livres = []
+        fuso = a_partir.tzinfo
+        for d in range(dias):
+            dia = (a_partir + timedelta(days=d)).date()
+            abre = datetime.combine(dia, abertura, fuso)
+            fecha = datetime.combine(dia, fechamento, fuso)
+            t = _arredondar(max(a_partir, abre), passo)
+            while t + duracao <= fecha:
+                ocupado_ate = self._livre(t, t + duracao)
+                if ocupado_ate is None:
+                    livres.append(t)
+                    if len(livres) >= quantidade:
+                        return livres
+                    t += passo
+                else:
+                    t = _arredondar(ocupado_ate, passo)
+        return livres
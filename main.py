@@ -1,41 +1,81 @@
 # Arquivo: main.py
 # Versão: 5.2 - Sistema completo com Clientes, Agenda, Notificações OneSignal e horário correto (Brasília)
 
-import streamlit as st
-from supabase import create_client, Client
-from dotenv import load_dotenv
 import os
+import tempfile
+import time
+import uuid
+from functools import wraps
+
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import date, datetime, timedelta, timezone
 import pandas as pd
 from streamlit_calendar import calendar
-import locale
 
-# Import correto do OneSignal SDK (versão atual)
-from onesignal_sdk.client import Client as OneSignalClient
+from agendador import Agendador
+from analises import ResumoAtendimentos
+from aniversarios import IndiceAniversarios
+from busca import IndiceBusca, somente_digitos
+from cache import CacheVersionado
+from espelho import EspelhoLocal
+from importacao import (COLUNAS_CLIENTES, chave_telefone, exportar_csv, importar_clientes, ler_planilha,
+                        normalizar_telefone)
+from intervalos import IndiceIntervalos
+from metricas import Metricas
+from modelos import (DURACAO_PADRAO, STATUS, STATUS_PADRAO, TZ_BRASIL, Agendamento, chave_mes,
+                     converter_agendamentos)
+from notificacoes import CaixaSaida, Despachante
+from recursos import (caminho_dados, carregar_configuracao, criar_onesignal, criar_sessao_http,
+                      criar_supabase, verificar_saude)
+from sincronizacao import Sincronizador, buscador_supabase
+
+# Configuração e clientes criados uma vez por processo (não a cada rerun)
+@st.cache_resource(show_spinner=False)
+def obter_configuracao():
+    return carregar_configuracao()
+
+config = obter_configuracao()
+onesignal_app_id = config.onesignal_app_id
+onesignal_rest_key = config.onesignal_rest_key
+
+if not config.supabase_url or not config.supabase_key:
+    st.error("⚠️ Configuração do Supabase não encontrada. Verifique o arquivo .env")
+    st.stop()
+
+@st.cache_resource(show_spinner=False)
+def obter_metricas():
+    return Metricas()
 
-# Configurar locale para português do Brasil
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except:
-    pass
+metricas = obter_metricas()
+inicio_rerun = time.perf_counter()
 
-load_dotenv()
+@st.cache_resource(show_spinner=False)
+def obter_supabase():
+    return criar_supabase(config, metricas)
 
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_ANON_KEY")
-onesignal_app_id = os.getenv("ONESIGNAL_APP_ID")
-onesignal_rest_key = os.getenv("ONESIGNAL_REST_API_KEY")
+@st.cache_resource(show_spinner=False)
+def obter_onesignal():
+    return criar_onesignal(config)
 
-if not supabase_url or not supabase_key:
-    st.error("⚠️ Configuração do Supabase não encontrada. Verifique o arquivo .env")
-    st.stop()
+@st.cache_resource(show_spinner=False)
+def obter_sessao_http():
+    return criar_sessao_http(config)
 
-supabase: Client = create_client(supabase_url, supabase_key)
+@st.cache_resource(show_spinner=False)
+def obter_caixa_saida():
+    """Fila de notificações + thread que envia ao OneSignal (uma por processo)."""
+    caixa = CaixaSaida(caminho_dados(config, "notificacoes.sqlite3"))
+    if onesignal_app_id and onesignal_rest_key:
+        Despachante(caixa, obter_sessao_http(), onesignal_app_id, onesignal_rest_key,
+                    config.onesignal_api_url, timeout=config.timeout,
+                    ao_enviar=lambda latencia, sucesso: metricas.registrar(
+                        "onesignal", {"operacao": "notifications"}, latencia, sucesso)).start()
+    return caixa
 
-# OneSignal client
-onesignal_client = None
-if onesignal_app_id and onesignal_rest_key:
-    onesignal_client = OneSignalClient(app_id=onesignal_app_id, rest_api_key=onesignal_rest_key)
+supabase = obter_supabase()
+onesignal_client = obter_onesignal()
 
 st.set_page_config(
     page_title="Depilação Claudia Ferraz",
@@ -99,21 +139,15 @@ with st.sidebar:
     st.markdown("### Navegação")
     menu = st.radio(
         "Escolha uma opção",
-        ["🏠 Início", "👩‍🦰 Clientes", "📅 Agenda", "🔔 Notificações", "⚙️ Configurações"],
+        ["🏠 Início", "👩‍🦰 Clientes", "📅 Agenda", "📊 Análises", "🔔 Notificações", "⚙️ Configurações"],
         label_visibility="collapsed"
     )
     st.markdown("---")
     st.caption("💖 Feito com carinho para a Claudia")
 
-# Timezone de Brasília
-TZ_BRASIL = timezone(timedelta(hours=-3))
-
 # Funções auxiliares
 def format_telefone(tel):
-    tel = ''.join(filter(str.isdigit, str(tel)))
-    if len(tel) == 11:
-        return f"({tel[:2]}) {tel[2:7]}-{tel[7:]}"
-    return tel or "-"
+    return normalizar_telefone(tel) or somente_digitos(tel) or "-"
 
 def format_data(data_str):
     if data_str:
@@ -123,80 +157,1114 @@ def format_data(data_str):
             return "-"
     return "-"
 
-def format_data_hora(data_iso):
-    if data_iso:
+def get_status_texto(status):
+    return STATUS.get(status, STATUS_PADRAO).texto
+
+# Cache das funções (versionado por tabela, compartilhado entre sessões)
+@st.cache_resource(show_spinner=False)
+def obter_cache():
+    return CacheVersionado()
+
+cache = obter_cache()
+
+# Cópia local de clientes e agendamentos, atualizada por delta (updated_at / deleted_at)
+@st.cache_resource(show_spinner=False)
+def obter_sincronizador():
+    espelho = EspelhoLocal(caminho_dados(config, "espelho.sqlite3"))
+    sincronizador = Sincronizador(buscador_supabase(supabase), espelho=espelho,
+                                  particoes={"agendamentos": lambda r: chave_mes(r['data_hora'])})
+    # Com espelho salvo a primeira tela sai na hora; o delta chega pela thread logo em seguida
+    if not sincronizador.carregar_espelho():
         try:
-            dt = datetime.fromisoformat(data_iso).astimezone(TZ_BRASIL)
-            return dt.strftime("%d/%m/%Y às %H:%M")
+            sincronizador.atualizar(notificar=False)
         except:
-            return "-"
-    return "-"
+            pass  # a thread tenta de novo; a primeira carga chega como inserções
+    return sincronizador
 
-def get_status_texto(status):
-    mapping = {
-        "nao_confirmado": "Não Confirmado",
-        "confirmado": "Confirmado",
-        "realizado": "Realizado",
-        "cancelado": "Cancelado"
-    }
-    return mapping.get(status, "Não Confirmado")
-
-def get_status_class(status):
-    mapping = {
-        "nao_confirmado": "status-nao",
-        "confirmado": "status-confirmado",
-        "realizado": "status-realizado",
-        "cancelado": "status-cancelado"
-    }
-    return mapping.get(status, "status-nao")
+sincronizador = obter_sincronizador()
+
+def somente_leitura():
+    """Sem resposta do banco: mostra a cópia local e bloqueia as escritas."""
+    return sincronizador.ultimo_erro is not None
+
+def aviso_somente_leitura():
+    if sincronizador.ultima_sincronizacao:
+        desde = datetime.fromtimestamp(sincronizador.ultima_sincronizacao, TZ_BRASIL).strftime("%d/%m %H:%M")
+        st.warning(f"📴 Sem conexão com o banco: modo somente leitura, dados da última sincronização ({desde}).")
+    elif sincronizador.pronto:
+        st.warning("📴 Sem conexão com o banco: modo somente leitura, dados salvos da última execução.")
+    else:
+        st.error("📴 Sem conexão com o banco e sem cópia local: nenhum dado disponível ainda.")
+
+bloqueado = somente_leitura()
+if bloqueado:
+    aviso_somente_leitura()
 
-# Cache das funções
-@st.cache_data(ttl=30)
 def contar_clientes():
-    try:
-        return supabase.table("clientes").select("id", count="exact").execute().count or 0
-    except:
-        return 0
+    return sincronizador.contar("clientes")
+
+@cache.memoizar("clientes")
+def carregar_indice_aniversarios():
+    """Índice (mês, dia) → clientes; só é reconstruído quando as clientes mudam."""
+    return IndiceAniversarios([c for c in sincronizador.linhas("clientes") if c.get('data_nascimento')])
 
-@st.cache_data(ttl=30)
 def contar_aniversarios():
-    try:
-        resp = supabase.table("clientes").select("data_nascimento").execute()
-        hoje = datetime.now(TZ_BRASIL)
-        return sum(1 for r in resp.data if r['data_nascimento'] and 
-                  datetime.fromisoformat(r['data_nascimento']).month == hoje.month and 
-                  datetime.fromisoformat(r['data_nascimento']).day == hoje.day)
-    except:
-        return 0
-
-@st.cache_data(ttl=60)
-def carregar_clientes():
-    try:
-        resp = supabase.table("clientes").select("id, nome, telefone").order("nome").execute()
-        return {c['id']: f"{c['nome']} - {format_telefone(c['telefone'])}" for c in resp.data}
-    except:
+    return len(carregar_indice_aniversarios().hoje(datetime.now(TZ_BRASIL).date()))
+
+# Busca de clientes (nome sem acento / dígitos do telefone), compartilhada entre sessões
+LIMITE_BUSCA = 20
+LIMITE_BUSCA_LISTA = 200
+
+@st.cache_resource(show_spinner=False)
+def obter_indice_busca():
+    """Montado da cópia local; depois só recebe as alterações da sincronização."""
+    indice = IndiceBusca()
+    indice.carregar(sincronizador.linhas("clientes"))
+    return indice
+
+indice_busca = obter_indice_busca()
+
+@st.cache_resource(show_spinner=False)
+def obter_resumo_atendimentos():
+    """Agregados da página de análises; montados da cópia local e mantidos pela sincronização."""
+    resumo = ResumoAtendimentos()
+    resumo.carregar(sincronizador.linhas("agendamentos"), sincronizador.linhas("clientes"))
+    return resumo
+
+resumo_atendimentos = obter_resumo_atendimentos()
+
+def rotulo_cliente(cliente):
+    return f"{cliente['nome']} - {format_telefone(cliente['telefone'])}"
+
+def com_cliente(registro):
+    """Linha de agendamento da cópia local com nome/telefone da cliente, como no select embutido."""
+    cliente = sincronizador.obter("clientes", registro['cliente_id']) or {}
+    return {**registro, "clientes": {"nome": cliente.get('nome'), "telefone": cliente.get('telefone')}}
+
+@cache.memoizar("agendamentos", ttl=600, chaves=lambda ano, mes: [f"{ano}-{mes:02d}"])
+def carregar_agendamentos_mes(ano, mes):
+    """Agendamentos de um mês (horário de Brasília), da partição do mês na cópia local.
+    Cada mês fica em cache separado."""
+    ags = converter_agendamentos(com_cliente(r) for r in sincronizador.linhas_particao("agendamentos", f"{ano}-{mes:02d}"))
+    return sorted(ags, key=lambda a: (a.inicio, a.id))
+
+# Margem de pré-carregamento em volta do período visível do calendário
+MARGEM_PERIODO = timedelta(days=7)
+
+def meses_do_periodo(inicio, fim):
+    """Lista (ano, mês) de todos os meses que cobrem [inicio, fim)."""
+    # Datas sem fuso (ex.: "2026-10-01") já estão no horário de Brasília
+    inicio = inicio.replace(tzinfo=TZ_BRASIL) if inicio.tzinfo is None else inicio.astimezone(TZ_BRASIL)
+    fim = fim.replace(tzinfo=TZ_BRASIL) if fim.tzinfo is None else fim.astimezone(TZ_BRASIL)
+    fim -= timedelta(microseconds=1)
+    meses = []
+    ano, mes = inicio.year, inicio.month
+    while (ano, mes) <= (fim.year, fim.month):
+        meses.append((ano, mes))
+        ano, mes = ano + mes // 12, mes % 12 + 1
+    return meses
+
+def ultimos_meses(hoje, quantidade):
+    """Chaves dos `quantidade` últimos meses até o de `hoje`, do mais antigo ao atual."""
+    meses = []
+    ano, mes = hoje.year, hoje.month
+    for _ in range(quantidade):
+        meses.append(f"{ano}-{mes:02d}")
+        ano, mes = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+    return meses[::-1]
+
+def carregar_agendamentos_periodo(inicio, fim):
+    """Agendamentos do período visível + margem, montados a partir dos meses em cache."""
+    agendamentos = []
+    for ano, mes in meses_do_periodo(inicio - MARGEM_PERIODO, fim + MARGEM_PERIODO):
+        agendamentos.extend(carregar_agendamentos_mes(ano, mes))
+    return agendamentos
+
+CORES_STATUS = {chave: info.cor for chave, info in STATUS.items()}
+# Fuso fixo de Brasília no formato ISO ("-03:00"), para formatar as datas sem isoformat() por linha
+SUFIXO_FUSO = datetime(2000, 1, 1, tzinfo=TZ_BRASIL).isoformat()[-6:]
+
+def chaves_calendario(inicio_iso, fim_iso):
+    inicio = datetime.fromisoformat(inicio_iso) - MARGEM_PERIODO
+    fim = datetime.fromisoformat(fim_iso) + MARGEM_PERIODO
+    return [f"{a}-{m:02d}" for a, m in meses_do_periodo(inicio, fim)]
+
+@cache.memoizar("agendamentos", chaves=chaves_calendario)
+def eventos_calendario(inicio_iso, fim_iso):
+    """Eventos do FullCalendar para o período visível, montados numa passada do pandas.
+    Em cache até mudar algum mês exibido (ou o nome de uma cliente): reruns sem escrita não refazem nada."""
+    ags = carregar_agendamentos_periodo(datetime.fromisoformat(inicio_iso), datetime.fromisoformat(fim_iso))
+    if not ags:
+        return []
+    df = pd.DataFrame({
+        "data_hora": [ag.data_hora for ag in ags],
+        "duracao": [ag.duracao for ag in ags],
+        "status": [ag.status for ag in ags],
+        "nome": [ag.cliente_nome for ag in ags],
+    })
+    inicio = pd.to_datetime(df["data_hora"], utc=True, format="ISO8601").dt.tz_convert(TZ_BRASIL)
+    fim = inicio + pd.to_timedelta(df["duracao"], unit="min")
+    cor = df["status"].map(CORES_STATUS).fillna(STATUS_PADRAO.cor)
+    eventos = pd.DataFrame({
+        "title": df["nome"] + " (" + inicio.dt.strftime("%H:%M") + ")",
+        "start": inicio.dt.strftime("%Y-%m-%dT%H:%M:%S") + SUFIXO_FUSO,
+        "end": fim.dt.strftime("%Y-%m-%dT%H:%M:%S") + SUFIXO_FUSO,
+        "backgroundColor": cor,
+        "borderColor": cor,
+    })
+    return eventos.to_dict("records")
+
+# Colunas permitidas para ordenar a lista de clientes no servidor
+ORDENACOES_CLIENTES = {
+    "Nome": "nome",
+    "Data de nascimento": "data_nascimento",
+    "Último atendimento": "ultimo_atendimento",
+}
+
+def pagina_local_clientes(pagina, por_pagina, ordem, decrescente):
+    """Mesma página da consulta ao servidor, montada da cópia local (como no Postgres, nulos
+    no fim em ordem crescente e no começo em decrescente; empates por id crescente)."""
+    clientes = sorted(sincronizador.linhas("clientes"), key=lambda c: c['id'])
+    clientes.sort(key=lambda c: (c.get(ordem) is None, c.get(ordem) or ""), reverse=decrescente)
+    inicio = pagina * por_pagina
+    return clientes[inicio:inicio + por_pagina], len(clientes)
+
+@cache.memoizar("clientes", ttl=600)
+def carregar_pagina_clientes(pagina, por_pagina, ordem, decrescente, local=False):
+    """Uma página de clientes, ordenada e paginada no servidor, com o total de registros.
+    Em modo somente leitura (ou se o banco falhar) vem da cópia local."""
+    if not local:
+        inicio = pagina * por_pagina
+        try:
+            resp = (supabase.table("clientes").select("*", count="exact").is_("deleted_at", "null")
+                    .order(ordem, desc=decrescente).order("id")
+                    .range(inicio, inicio + por_pagina - 1).execute())
+            return resp.data, resp.count or 0
+        except:
+            pass
+    return pagina_local_clientes(pagina, por_pagina, ordem, decrescente)
+
+def carregar_clientes_por_ids(ids):
+    """Clientes completas na ordem de `ids` (resultado da busca), da cópia local."""
+    return [c for c in (sincronizador.obter("clientes", i) for i in ids) if c]
+
+def voltar_primeira_pagina_clientes():
+    st.session_state['clientes_pagina'] = 1
+
+# Filtros da lista de agendamentos
+PERIODOS_LISTA = ["Hoje e próximos", "Hoje", "Passados", "Intervalo de datas", "Todo o histórico"]
+STATUS_OPCOES = list(STATUS)
+
+def chaves_meses_iso(inicio, fim):
+    """Chaves de cache dos meses entre dois ISO; None quando o intervalo é aberto."""
+    if not inicio or not fim:
+        return None
+    return [f"{a}-{m:02d}" for a, m in meses_do_periodo(datetime.fromisoformat(inicio), datetime.fromisoformat(fim))]
+
+def pagina_local_agendamentos(pagina, por_pagina, inicio, fim, status, cliente_ids, decrescente):
+    """Mesmos filtros e ordem da consulta ao servidor, aplicados à cópia local (só os meses do período)."""
+    linhas = sincronizador.linhas_particoes("agendamentos", chave_mes(inicio) if inicio else None,
+                                            chave_mes(fim) if fim else None)
+    inicio = datetime.fromisoformat(inicio) if inicio else None
+    fim = datetime.fromisoformat(fim) if fim else None
+    selecionados = []
+    for r in linhas:
+        momento = datetime.fromisoformat(r['data_hora'])
+        if ((inicio is None or momento >= inicio) and (fim is None or momento < fim)
+                and (not status or r['status'] in status)
+                and (cliente_ids is None or r['cliente_id'] in cliente_ids)):
+            selecionados.append((momento, r['id'], r))
+    selecionados.sort(key=lambda item: item[:2], reverse=decrescente)
+    offset = pagina * por_pagina
+    return (converter_agendamentos(com_cliente(r) for _m, _id, r in selecionados[offset:offset + por_pagina]),
+            len(selecionados))
+
+@cache.memoizar("agendamentos", ttl=600,
+                chaves=lambda pagina, por_pagina, inicio, fim, *filtros, **_local: chaves_meses_iso(inicio, fim))
+def carregar_pagina_agendamentos(pagina, por_pagina, inicio, fim, status, cliente_ids, decrescente, local=False):
+    """Uma página de agendamentos filtrada no servidor por período, status e clientes.
+    Em modo somente leitura (ou se o banco falhar) vem da cópia local."""
+    if not local:
+        query = supabase.table("agendamentos").select("*, clientes(nome, telefone)", count="exact").is_("deleted_at", "null")
+        if inicio:
+            query = query.gte("data_hora", inicio)
+        if fim:
+            query = query.lt("data_hora", fim)
+        if status:
+            query = query.in_("status", list(status))
+        if cliente_ids is not None:
+            query = query.in_("cliente_id", list(cliente_ids))
+        offset = pagina * por_pagina
+        try:
+            resp = (query.order("data_hora", desc=decrescente).order("id", desc=decrescente)
+                    .range(offset, offset + por_pagina - 1).execute())
+            return converter_agendamentos(resp.data), resp.count or 0
+        except:
+            pass
+    return pagina_local_agendamentos(pagina, por_pagina, inicio, fim, status, cliente_ids, decrescente)
+
+def voltar_primeira_pagina_agendamentos():
+    st.session_state['agendamentos_pagina'] = 1
+
+# Ocupação da agenda para checar conflitos e sugerir horários livres
+def limites_ocupacao(dia, dias):
+    inicio = datetime.combine(dia, datetime.min.time(), TZ_BRASIL)
+    return inicio, inicio + timedelta(days=dias)
+
+@cache.memoizar("agendamentos", ttl=600,
+                chaves=lambda dia, dias=8: [f"{a}-{m:02d}" for a, m in meses_do_periodo(*limites_ocupacao(dia, dias))])
+def indice_ocupacao(dia, dias=8):
+    """Índice de intervalos dos agendamentos não cancelados de `dias` dias a partir de `dia`."""
+    inicio, fim = limites_ocupacao(dia, dias)
+    ags = [a for a in carregar_agendamentos_periodo(inicio, fim)
+           if a.status != "cancelado" and a.fim > inicio and a.inicio < fim]
+    return IndiceIntervalos((a.inicio, a.fim, a.id) for a in ags), {a.id: a for a in ags}
+
+def verificar_horario(inicio, duracao, ignorar=()):
+    """Agendamentos em conflito com [inicio, inicio + duracao) e, se houver, os próximos horários livres."""
+    ocupacao, por_id = indice_ocupacao(inicio.date())
+    conflitos = [por_id[i] for i in ocupacao.conflitos(inicio, inicio + timedelta(minutes=duracao), ignorar)]
+    sugestoes = ocupacao.proximos_livres(inicio, timedelta(minutes=duracao)) if conflitos else []
+    return conflitos, sugestoes
+
+# Séries (retorno a cada N semanas)
+REPETICOES = [0, 1, 2, 3, 4, 5, 6, 8]
+ESCOPOS_SERIE = {"Só este": "este", "Este e os seguintes": "seguintes", "Toda a série": "todos"}
+
+def ocorrencias_serie(inicio, semanas, quantidade):
+    """Inícios da série: `quantidade` horários a cada `semanas` semanas, no mesmo horário."""
+    return [inicio + timedelta(weeks=semanas * i) for i in range(quantidade)]
+
+def conflitos_serie(inicios, duracao, ignorar=()):
+    """{início: [conflitos]} da série inteira numa passada, com um só índice da primeira à última data."""
+    if not inicios:
         return {}
+    dias = (inicios[-1].date() - inicios[0].date()).days + 1
+    ocupacao, por_id = indice_ocupacao(inicios[0].date(), dias)
+    passo = timedelta(minutes=duracao)
+    conflitos = {}
+    for inicio in inicios:
+        ids = ocupacao.conflitos(inicio, inicio + passo, ignorar)
+        if ids:
+            conflitos[inicio] = [por_id[i] for i in ids]
+    return conflitos
+
+def ocorrencias_alcancadas(ag, escopo):
+    """Agendamentos que uma edição com `escopo` alcança, em ordem de horário. Lidos do servidor pelo
+    índice (serie_id, data_hora) com o mesmo critério da RPC: a cópia local pode ainda não ter a série."""
+    if escopo == "este" or not ag.serie_id:
+        return [ag]
+    query = (supabase.table("agendamentos").select("*, clientes(nome, telefone)")
+             .eq("serie_id", ag.serie_id).is_("deleted_at", "null"))
+    if escopo == "seguintes":
+        query = query.gte("data_hora", ag.data_hora)
+    return converter_agendamentos(query.order("data_hora").order("id").execute().data) or [ag]
+
+def mostrar_conflitos_serie(conflitos):
+    st.error(f"⚠️ {len(conflitos)} horário(s) da série com conflito:\n" + "\n".join(
+        f"- {inicio.strftime('%d/%m/%Y %H:%M')}: " + "; ".join(c.cliente_nome for c in cs)
+        for inicio, cs in conflitos.items()))
+
+def mostrar_conflitos(conflitos, sugestoes):
+    st.error("⚠️ Conflito de horário com: " + "; ".join(
+        f"{c.cliente_nome} ({c.hora}–{c.fim.strftime('%H:%M')})" for c in conflitos))
+    if sugestoes:
+        st.info("🕒 Próximos horários livres: " + ", ".join(t.strftime("%d/%m %H:%M") for t in sugestoes))
+    else:
+        st.info("Nenhum horário livre nos próximos 7 dias para essa duração.")
+
+# Visões do calendário; a navegação é feita pelos botões do app (o componente não informa o período visível)
+VISOES_CALENDARIO = {"Mês": "dayGridMonth", "Semana": "timeGridWeek", "Dia": "timeGridDay"}
+
+def periodo_calendario(visao, dia):
+    """Período visível do FullCalendar na `visao` que contém `dia`. Semanas começam no domingo
+    (firstDay 0) e o mês sempre mostra 6 semanas (fixedWeekCount), como nas opções do calendário."""
+    if visao == "dayGridMonth":
+        ancora = dia.replace(day=1)
+        inicio = ancora - timedelta(days=(ancora.weekday() + 1) % 7)
+        fim = inicio + timedelta(weeks=6)
+    elif visao == "timeGridWeek":
+        ancora = inicio = dia - timedelta(days=(dia.weekday() + 1) % 7)
+        fim = inicio + timedelta(days=7)
+    else:
+        ancora = inicio = dia
+        fim = dia + timedelta(days=1)
+    return {"start": datetime.combine(inicio, datetime.min.time(), TZ_BRASIL).isoformat(),
+            "end": datetime.combine(fim, datetime.min.time(), TZ_BRASIL).isoformat(),
+            "view": visao, "initialDate": ancora.isoformat()}
+
+def periodo_padrao():
+    """Mês atual, período inicial do calendário."""
+    return periodo_calendario("dayGridMonth", datetime.now(TZ_BRASIL).date())
+
+def navegar_calendario(passo):
+    """Avança (1), volta (-1) ou vai para hoje (0) na visão atual."""
+    periodo = st.session_state['agenda_periodo']
+    visao, dia = periodo['view'], date.fromisoformat(periodo['initialDate'])
+    if passo == 0:
+        dia = datetime.now(TZ_BRASIL).date()
+    elif visao == "dayGridMonth":
+        ano, mes = divmod(dia.year * 12 + dia.month - 1 + passo, 12)
+        dia = date(ano, mes + 1, 1)
+    else:
+        dia += timedelta(days=passo * (7 if visao == "timeGridWeek" else 1))
+    st.session_state['agenda_periodo'] = periodo_calendario(visao, dia)
+
+def mudar_visao_calendario():
+    periodo = st.session_state['agenda_periodo']
+    dia = date.fromisoformat(periodo['initialDate'])
+    hoje = datetime.now(TZ_BRASIL).date()
+    # Do mês atual para semana/dia, abre em hoje e não no dia 1º
+    if periodo['view'] == "dayGridMonth" and (hoje.year, hoje.month) == (dia.year, dia.month):
+        dia = hoje
+    st.session_state['agenda_periodo'] = periodo_calendario(VISOES_CALENDARIO[st.session_state['agenda_visao']], dia)
 
-@st.cache_data(ttl=60)
-def carregar_agendamentos():
-    try:
-        resp = supabase.table("agendamentos").select("*, clientes(nome, telefone)").order("data_hora").execute()
-        return resp.data
-    except:
-        return []
+def contar_agendamentos_dia(dia):
+    return sum(1 for a in carregar_agendamentos_mes(dia.year, dia.month) if a.dia == dia)
 
-@st.cache_data(ttl=60)
 def contar_agendamentos_hoje():
-    hoje = datetime.now(TZ_BRASIL).date()
-    agendamentos = carregar_agendamentos()
-    return len([a for a in agendamentos if datetime.fromisoformat(a['data_hora']).astimezone(TZ_BRASIL).date() == hoje])
+    return contar_agendamentos_dia(datetime.now(TZ_BRASIL).date())
+
+def metricas_inicio():
+    """As três contagens do Início, todas da cópia local (sem ida ao banco)."""
+    return contar_clientes(), contar_agendamentos_hoje(), contar_aniversarios()
+
+# Notificações automáticas (lembretes, aniversários e retorno)
+def carregar_gatilhos():
+    """Agendamentos futuros e clientes com último atendimento, da cópia local (aniversários vêm do índice)."""
+    if not sincronizador.pronto:
+        raise RuntimeError("cópia local ainda não carregada")
+    agora = datetime.now(timezone.utc)
+    ags = [Agendamento.de_registro({**r, "clientes": sincronizador.obter("clientes", r['cliente_id'])})
+           for r in sincronizador.linhas("agendamentos")
+           if r['status'] in ("nao_confirmado", "confirmado") and datetime.fromisoformat(r['data_hora']) >= agora]
+    clientes = [c for c in sincronizador.linhas("clientes") if c.get('ultimo_atendimento')]
+    return ags, clientes
+
+@st.cache_resource(show_spinner=False)
+def obter_agendador():
+    agendador = Agendador(obter_caixa_saida(), carregar_gatilhos, lambda dia: carregar_indice_aniversarios().do_dia(dia),
+                          horas_lembrete=config.lembrete_horas, dias_retorno=config.retorno_dias)
+    if onesignal_app_id and onesignal_rest_key:
+        agendador.start()
+    return agendador
+
+agendador = obter_agendador()
+
+# Propagação das alterações (do próprio app ou de fora): cache, índice de busca e agendador
+def propagar_alteracoes(tabela, alteracoes):
+    if tabela == "clientes":
+        cache.invalidar("clientes")
+        resumo_atendimentos.aplicar_clientes(alteracoes)
+        # Nome e telefone aparecem embutidos nos agendamentos
+        if any(antes and (depois is None or (antes['nome'], antes['telefone']) != (depois['nome'], depois['telefone']))
+               for antes, depois in alteracoes):
+            cache.invalidar("agendamentos")
+        for antes, depois in alteracoes:
+            if depois is None:
+                indice_busca.remover(antes['id'])
+                agendador.remover_cliente(antes['id'])
+            else:
+                indice_busca.atualizar(depois)
+                agendador.atualizar_cliente(depois)
+    else:
+        meses = {chave_mes(r['data_hora']) for par in alteracoes for r in par if r}
+        cache.invalidar("agendamentos", *meses)
+        resumo_atendimentos.aplicar_agendamentos(alteracoes)
+        for antes, depois in alteracoes:
+            if depois is None:
+                agendador.remover_agendamento(antes['id'])
+            else:
+                cliente = sincronizador.obter("clientes", depois['cliente_id']) or {}
+                agendador.atualizar_agendamento(depois['id'], depois['data_hora'], depois['status'], cliente.get('nome', "-"))
+
+@st.cache_resource(show_spinner=False)
+def iniciar_sincronizacao():
+    sincronizador.assinar(propagar_alteracoes)
+    sincronizador.iniciar(config.sync_intervalo)
+    return True
+
+iniciar_sincronizacao()
+
+def excluir(tabela, coluna, valor):
+    """Exclusão lógica: a linha vira lápide (deleted_at) e some das leituras e da cópia local."""
+    resp = (supabase.table(tabela).update({"deleted_at": datetime.now(timezone.utc).isoformat()})
+            .eq(coluna, valor).is_("deleted_at", "null").execute())
+    sincronizador.aplicar(tabela, resp.data)
+
+def marcar_serie(cliente_id, inicios, duracao, observacoes):
+    """Todas as ocorrências da série num único insert de várias linhas."""
+    serie_id = str(uuid.uuid4())
+    resp = supabase.table("agendamentos").insert([{
+        "cliente_id": cliente_id,
+        "data_hora": inicio.astimezone(timezone.utc).isoformat(),
+        "duracao_minutos": duracao,
+        "status": "nao_confirmado",
+        "observacoes": observacoes,
+        "serie_id": serie_id,
+    } for inicio in inicios]).execute()
+    sincronizador.aplicar("agendamentos", resp.data)
+    return len(resp.data)
+
+def editar_serie(ag_id, escopo, alteracoes=None, deslocamento=timedelta(0), excluir_linhas=False):
+    """Edita ou exclui este agendamento, este e os seguintes ou a série toda numa chamada (RPC do sql/004)."""
+    resp = supabase.rpc("editar_serie_agendamentos", {
+        "ag_id": ag_id,
+        "escopo": escopo,
+        "alteracoes": alteracoes or {},
+        "deslocamento_minutos": int(deslocamento.total_seconds() // 60),
+        "excluir": excluir_linhas,
+    }).execute()
+    sincronizador.aplicar("agendamentos", resp.data)
+    return len(resp.data)
+
+# Ações em lote da lista de agendamentos: rótulo do botão → novo status
+ACOES_EM_LOTE = {"✅ Confirmar": "confirmado", "✨ Realizado": "realizado", "❌ Cancelar": "cancelado"}
+
+def alterar_status(ids, novo_status):
+    """Novo status para vários agendamentos numa chamada e numa transação (RPC do sql/003);
+    "realizado" atualiza o último atendimento das clientes na mesma chamada."""
+    resp = supabase.rpc("alterar_status_agendamentos", {"ids": list(ids), "novo_status": novo_status}).execute()
+    sincronizador.aplicar("agendamentos", resp.data["agendamentos"])
+    sincronizador.aplicar("clientes", resp.data["clientes"])
+    return len(resp.data["agendamentos"])
+
+# Fragmentos: cada interação reroda só o seu pedaço da página (st.fragment).
+# Escritas que mudam outro pedaço (a grade, o calendário) pedem o rerun completo.
+def fragmento(func):
+    """st.fragment que também mede cada execução no painel de desempenho."""
+    @st.fragment
+    @wraps(func)
+    def executar(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metricas.registrar("fragmento", {"fragmento": func.__name__}, time.perf_counter() - inicio)
+    return executar
+
+def rerun_fragmento():
+    """Reroda só o fragmento atual (ou o app, se a interação veio de uma execução completa)."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def versao_calendario(periodo):
+    """Versão dos meses que o calendário mostra (período visível + margem)."""
+    inicio = datetime.fromisoformat(periodo['start']) - MARGEM_PERIODO
+    fim = datetime.fromisoformat(periodo['end']) + MARGEM_PERIODO
+    return tuple(cache.versao("agendamentos", f"{a}-{m:02d}") for a, m in meses_do_periodo(inicio, fim))
+
+def apos_escrita():
+    """Depois de gravar um agendamento: o calendário só é reenviado se os dados dele mudaram."""
+    periodo = st.session_state.get('agenda_periodo')
+    if periodo and st.session_state.get('calendario_versao') != versao_calendario(periodo):
+        st.rerun()
+    rerun_fragmento()
+
+@fragmento
+def fragmento_nova_cliente():
+    with st.form("cadastro_cliente", clear_on_submit=True):
+        st.subheader("Cadastrar Nova Cliente")
+        nome = st.text_input("Nome completo *", placeholder="Ex: Maria Silva")
+        telefone = st.text_input("Telefone *", placeholder="(11) 91234-5678")
+        data_nascimento = st.date_input("Data de nascimento", value=None, min_value=date(1900,1,1))
+        observacoes = st.text_area("Observações")
+
+        if st.form_submit_button("💾 Salvar Cliente", disabled=bloqueado):
+            if not nome.strip() or not telefone.strip():
+                st.error("⚠️ Nome e telefone são obrigatórios!")
+            else:
+                try:
+                    data = {
+                        "nome": nome.strip(),
+                        "telefone": telefone.strip(),
+                        "data_nascimento": str(data_nascimento) if data_nascimento else None,
+                        "observacoes": observacoes.strip() if observacoes.strip() else None
+                    }
+                    resp = supabase.table("clientes").insert(data).execute()
+                    st.success(f"✅ {nome} cadastrada com sucesso!")
+                    sincronizador.aplicar("clientes", resp.data)
+                except Exception:
+                    st.error("Erro ao salvar cliente.")
+                else:
+                    st.rerun()
+
+@fragmento
+def fragmento_lista_clientes():
+    st.subheader("Todas as Clientes")
+    try:
+        c1, c2, c3, c4 = st.columns([4, 2, 2, 1])
+        with c1:
+            busca = st.text_input("🔍 Buscar por nome ou telefone", on_change=voltar_primeira_pagina_clientes)
+        with c2:
+            ordem_label = st.selectbox("Ordenar por", list(ORDENACOES_CLIENTES), on_change=voltar_primeira_pagina_clientes)
+        with c3:
+            sentido = st.selectbox("Ordem", ["Crescente", "Decrescente"], on_change=voltar_primeira_pagina_clientes)
+        with c4:
+            por_pagina = st.selectbox("Por página", [25, 50, 100], on_change=voltar_primeira_pagina_clientes)
+
+        ordem = ORDENACOES_CLIENTES[ordem_label]
+        decrescente = sentido == "Decrescente"
+        pagina = st.session_state.setdefault('clientes_pagina', 1)
+        if busca.strip():
+            # Busca no índice local; a ordem segue a relevância (começo do nome primeiro)
+            ids_encontrados = [c['id'] for c in indice_busca.buscar(busca, limite=LIMITE_BUSCA_LISTA)]
+            total = len(ids_encontrados)
+        else:
+            clientes_pagina, total = carregar_pagina_clientes(pagina - 1, por_pagina, ordem, decrescente, local=somente_leitura())
+        total_paginas = max(1, -(-total // por_pagina))
+        if pagina > total_paginas:
+            st.session_state['clientes_pagina'] = pagina = total_paginas
+            if not busca.strip():
+                clientes_pagina, total = carregar_pagina_clientes(pagina - 1, por_pagina, ordem, decrescente, local=somente_leitura())
+        if busca.strip():
+            inicio = (pagina - 1) * por_pagina
+            clientes_pagina = carregar_clientes_por_ids(tuple(ids_encontrados[inicio:inicio + por_pagina]))
+
+        if not total:
+            st.info("Nenhuma cliente encontrada." if busca.strip() else "Nenhuma cliente cadastrada ainda.")
+        else:
+            df = pd.DataFrame({
+                "Nome": [c['nome'] for c in clientes_pagina],
+                "Telefone": [format_telefone(c['telefone']) for c in clientes_pagina],
+                "Nascimento": [format_data(c['data_nascimento']) for c in clientes_pagina],
+                "Observações": [c['observacoes'] or "-" for c in clientes_pagina],
+                "Último atendimento": [format_data(c.get('ultimo_atendimento')) for c in clientes_pagina],
+            })
+            selecao = st.dataframe(
+                df, hide_index=True, use_container_width=True,
+                on_select="rerun", selection_mode="single-row",
+                key=f"grade_clientes_{pagina}_{por_pagina}_{ordem}_{decrescente}_{busca.strip()}",
+            )
+
+            c1, c2, c3 = st.columns([2, 2, 3])
+            with c1:
+                st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, key='clientes_pagina')
+            with c2:
+                if busca.strip() and total >= LIMITE_BUSCA_LISTA:
+                    st.caption(f"Mostrando as {LIMITE_BUSCA_LISTA} primeiras. Refine a busca.")
+                else:
+                    st.caption(f"{total} cliente(s)")
+
+            linhas = selecao.selection.rows
+            cliente_sel = clientes_pagina[linhas[0]] if linhas else None
+            with c3:
+                b1, b2 = st.columns(2)
+                with b1:
+                    if st.button("✏️ Editar", disabled=cliente_sel is None):
+                        st.session_state['cliente_edit'] = cliente_sel
+                with b2:
+                    if st.button("🗑️ Deletar", disabled=cliente_sel is None, type="secondary"):
+                        st.session_state['cliente_del_id'] = cliente_sel['id']
+                        st.session_state['cliente_del_nome'] = cliente_sel['nome']
+
+            fragmento_editar_cliente()
+            fragmento_excluir_cliente()
+
+    except Exception as e:
+        st.error("Erro ao carregar clientes.")
+
+@fragmento
+def fragmento_editar_cliente():
+    if 'cliente_edit' not in st.session_state:
+        return
+    cliente = st.session_state['cliente_edit']
+    with st.expander(f"✏️ Editando: {cliente['nome']}", expanded=True):
+        with st.form("form_edit"):
+            novo_nome = st.text_input("Nome *", value=cliente['nome'])
+            novo_tel = st.text_input("Telefone *", value=cliente['telefone'], placeholder="(11) 91234-5678")
+            nova_data = date.fromisoformat(cliente['data_nascimento']) if cliente['data_nascimento'] else None
+            novo_nasc = st.date_input("Data de nascimento", value=nova_data)
+            novas_obs = st.text_area("Observações", value=cliente['observacoes'] or "")
+
+            c1, c2 = st.columns(2)
+            with c1:
+                if st.form_submit_button("💾 Atualizar", disabled=bloqueado):
+                    if not novo_nome.strip() or not novo_tel.strip():
+                        st.error("Campos obrigatórios!")
+                    else:
+                        try:
+                            resp = supabase.table("clientes").update({
+                                "nome": novo_nome.strip(),
+                                "telefone": novo_tel.strip(),
+                                "data_nascimento": str(novo_nasc) if novo_nasc else None,
+                                "observacoes": novas_obs.strip() if novas_obs.strip() else None
+                            }).eq("id", cliente['id']).execute()
+                            st.success("Cliente atualizada!")
+                            sincronizador.aplicar("clientes", resp.data)
+                            del st.session_state['cliente_edit']
+                        except Exception:
+                            st.error("Erro ao atualizar.")
+                        else:
+                            st.rerun()
+            with c2:
+                if st.form_submit_button("Cancelar"):
+                    del st.session_state['cliente_edit']
+                    rerun_fragmento()
+
+@fragmento
+def fragmento_excluir_cliente():
+    if 'cliente_del_id' not in st.session_state:
+        return
+    nome = st.session_state['cliente_del_nome']
+    with st.expander("🗑️ Confirmação de Exclusão", expanded=True):
+        st.error(f"Tem certeza que deseja deletar **{nome}**?")
+        c1, c2 = st.columns(2)
+        with c1:
+            if st.button("🗑️ Sim, deletar", type="secondary", disabled=bloqueado):
+                try:
+                    excluir("agendamentos", "cliente_id", st.session_state['cliente_del_id'])
+                    excluir("clientes", "id", st.session_state['cliente_del_id'])
+                    st.success(f"{nome} removida com sucesso.")
+                    del st.session_state['cliente_del_id']
+                    del st.session_state['cliente_del_nome']
+                except Exception:
+                    st.error("Erro ao deletar.")
+                else:
+                    st.rerun()
+        with c2:
+            if st.button("Cancelar"):
+                del st.session_state['cliente_del_id']
+                del st.session_state['cliente_del_nome']
+                rerun_fragmento()
+
+# Importação / exportação em massa
+COLUNAS_AGENDAMENTOS = ("id", "cliente_id", "cliente_nome", "cliente_telefone", "data_hora",
+                        "duracao_minutos", "status", "observacoes")
+
+def inserir_clientes(lote):
+    """Um insert de várias linhas por bloco da planilha."""
+    resp = supabase.table("clientes").insert(lote).execute()
+    sincronizador.aplicar("clientes", resp.data)
+
+def buscar_pagina_exportacao(tabela, selecao):
+    def buscar(apos_id, limite):
+        query = supabase.table(tabela).select(selecao).is_("deleted_at", "null").order("id").limit(limite)
+        if apos_id is not None:
+            query = query.gt("id", apos_id)
+        return query.execute().data
+    return buscar
+
+def linha_exportacao_agendamento(registro):
+    cliente = registro.get('clientes') or {}
+    return {**registro, "cliente_nome": cliente.get('nome'), "cliente_telefone": cliente.get('telefone')}
+
+EXPORTACOES = {
+    "clientes": (buscar_pagina_exportacao("clientes", "*"), ("id",) + COLUNAS_CLIENTES + ("ultimo_atendimento",), None),
+    "agendamentos": (buscar_pagina_exportacao("agendamentos", "*, clientes(nome, telefone)"),
+                     COLUNAS_AGENDAMENTOS, linha_exportacao_agendamento),
+}
+
+def descartar_exportacao(tabela):
+    """Apaga o CSV temporário da sessão (depois do download ou ao gerar outro)."""
+    caminho, _total = st.session_state.pop(f'exportacao_{tabela}', (None, None))
+    if caminho:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+@fragmento
+def fragmento_importar_exportar():
+    st.subheader("📥 Importar clientes")
+    st.caption("CSV ou XLSX com as colunas **nome** e **telefone** (opcionais: **data_nascimento**, **observacoes**). "
+               "Telefones já cadastrados ou repetidos na planilha são ignorados.")
+    arquivo = st.file_uploader("Planilha", type=["csv", "xlsx"], label_visibility="collapsed")
+    if st.button("📥 Importar", disabled=bloqueado or arquivo is None):
+        barra = st.progress(0.0, text="Importando...")
+        def ao_progredir(fracao, resultado):
+            barra.progress(fracao, text=f"{resultado.inseridas} cliente(s) importada(s)...")
+        try:
+            existentes = (chave_telefone(c['telefone']) for c in sincronizador.linhas("clientes"))
+            resultado = importar_clientes(ler_planilha(arquivo, arquivo.name), existentes, inserir_clientes, ao_progredir)
+            barra.progress(1.0, text="Importação concluída.")
+            st.session_state['importacao_resultado'] = resultado
+        except ValueError as e:
+            barra.empty()
+            st.error(f"Planilha inválida: {e}")
+        except:
+            barra.empty()
+            st.error("Erro ao ler a planilha.")
+
+    resultado = st.session_state.get('importacao_resultado')
+    if resultado:
+        st.success(f"✅ {resultado.inseridas} de {resultado.lidas} cliente(s) importada(s); "
+                   f"{resultado.duplicadas} repetida(s), {len(resultado.problemas) - resultado.duplicadas} com erro.")
+        if resultado.problemas:
+            st.dataframe(pd.DataFrame(resultado.problemas[:200], columns=["Linha", "Motivo"]), hide_index=True)
+            st.download_button("⬇️ Relatório completo", resultado.relatorio_csv(), "importacao_erros.csv", "text/csv")
+
+    st.markdown("---")
+    st.subheader("📤 Exportar")
+    c1, c2 = st.columns(2)
+    for coluna, tabela in zip((c1, c2), EXPORTACOES):
+        with coluna:
+            if st.button(f"Gerar CSV de {tabela}", key=f"exportar_{tabela}"):
+                descartar_exportacao(tabela)
+                buscar, colunas, converter = EXPORTACOES[tabela]
+                try:
+                    with st.spinner("Exportando..."):
+                        # Arquivo temporário desta sessão, página a página; utf-8-sig para o Excel abrir os acentos
+                        with tempfile.NamedTemporaryFile("w", encoding="utf-8-sig", newline="", suffix=".csv",
+                                                         prefix=f"exportacao_{tabela}_", delete=False) as destino:
+                            st.session_state[f'exportacao_{tabela}'] = (destino.name, None)
+                            total = exportar_csv(destino, buscar, colunas, converter)
+                    st.session_state[f'exportacao_{tabela}'] = (destino.name, total)
+                except:
+                    descartar_exportacao(tabela)
+                    st.error("Erro ao exportar.")
+            caminho, total = st.session_state.get(f'exportacao_{tabela}', (None, None))
+            if total is not None:
+                try:
+                    with open(caminho, "rb") as arquivo_exportado:
+                        st.download_button(f"⬇️ {tabela}.csv ({total} linhas)", arquivo_exportado, f"{tabela}.csv",
+                                           "text/csv", key=f"baixar_{tabela}", on_click=descartar_exportacao, args=(tabela,))
+                except OSError:
+                    descartar_exportacao(tabela)
+                    st.warning("O arquivo exportado não está mais disponível. Gere o CSV de novo.")
+
+@fragmento
+def fragmento_calendario():
+    periodo = st.session_state['agenda_periodo']
+    c1, c2, c3, c4 = st.columns([1, 1, 1, 5])
+    with c1:
+        st.button("◀", key="calendario_anterior", on_click=navegar_calendario, args=(-1,), use_container_width=True)
+    with c2:
+        st.button("Hoje", key="calendario_hoje", on_click=navegar_calendario, args=(0,), use_container_width=True)
+    with c3:
+        st.button("▶", key="calendario_proximo", on_click=navegar_calendario, args=(1,), use_container_width=True)
+    with c4:
+        st.radio("Visualização", list(VISOES_CALENDARIO), horizontal=True, key="agenda_visao",
+                 on_change=mudar_visao_calendario, label_visibility="collapsed")
+    events = eventos_calendario(periodo['start'], periodo['end'])
+
+    calendar_options = {
+        "headerToolbar": {"left": "", "center": "title", "right": ""},
+        "initialView": periodo['view'],
+        "initialDate": periodo['initialDate'],
+        "firstDay": 0,
+        "fixedWeekCount": True,
+        "selectable": True,
+        "height": 800,
+        "contentHeight": 750,
+        "locale": "pt-br",
+        "slotMinTime": "08:00:00",
+        "slotMaxTime": "21:00:00",
+    }
+
+    st.session_state['calendario_versao'] = versao_calendario(periodo)
+    # A chave muda com o período: o FullCalendar só lê initialView/initialDate ao ser montado
+    calendar(events=events, options=calendar_options, callbacks=["dateClick", "eventClick", "select"],
+             key=f"calendario_{periodo['view']}_{periodo['initialDate']}")
+
+@fragmento
+def fragmento_nova_marcacao():
+    st.subheader("Marcar Novo Horário")
+    busca_cliente = st.text_input("🔍 Buscar cliente por nome ou telefone", key="busca_nova_marcacao")
+    opcoes_clientes = {c['id']: rotulo_cliente(c) for c in indice_busca.buscar(busca_cliente, limite=LIMITE_BUSCA)}
+    with st.form("nova_marcacao"):
+        if not len(indice_busca):
+            st.warning("Cadastre pelo menos uma cliente antes.")
+            st.form_submit_button("📅 Marcar Horário", disabled=True)
+        elif not opcoes_clientes:
+            st.warning("Nenhuma cliente encontrada para essa busca.")
+            st.form_submit_button("📅 Marcar Horário", disabled=True)
+        else:
+            cliente_id = st.selectbox("Cliente *", options=list(opcoes_clientes.keys()), format_func=lambda x: opcoes_clientes[x])
+            data = st.date_input("Data", value=date.today())
+            hora = st.time_input("Horário", value=datetime.now(TZ_BRASIL).replace(minute=0, second=0) + timedelta(hours=1))
+            duracao = st.number_input("Duração (minutos)", min_value=15, max_value=480, value=DURACAO_PADRAO, step=15)
+            data_hora_local = datetime.combine(data, hora, TZ_BRASIL)
+            data_hora_utc = data_hora_local.astimezone(timezone.utc)
+            observacoes = st.text_area("Observações do agendamento")
+            c1, c2 = st.columns(2)
+            with c1:
+                repetir = st.selectbox("Repetir", REPETICOES,
+                                       format_func=lambda n: f"A cada {n} semana(s)" if n else "Não repetir")
+            with c2:
+                quantidade = st.number_input("Horários na série", min_value=2, max_value=52, value=6,
+                                             help="Usado só quando o agendamento se repete")
+            forcar = st.checkbox("Marcar mesmo se houver conflito de horário")
+            pular = st.checkbox("Na série, pular as datas com conflito")
+
+            enviado = st.form_submit_button("📅 Marcar Horário", disabled=bloqueado)
+            if enviado and repetir:
+                inicios = ocorrencias_serie(data_hora_local, repetir, quantidade)
+                conflitos = conflitos_serie(inicios, duracao)
+                if conflitos and not (forcar or pular):
+                    mostrar_conflitos_serie(conflitos)
+                else:
+                    if not forcar:
+                        inicios = [inicio for inicio in inicios if inicio not in conflitos]
+                    if not inicios:
+                        st.warning("Todas as datas da série têm conflito; nada foi marcado.")
+                    else:
+                        try:
+                            marcados = marcar_serie(cliente_id, inicios, duracao, observacoes.strip() or None)
+                            st.success(f"{marcados} horários marcados ({len(conflitos) if not forcar else 0} pulado(s))!")
+                        except Exception as e:
+                            st.error(f"Erro ao marcar a série: {str(e)}")
+                        else:
+                            st.rerun()
+            elif enviado:
+                conflitos, sugestoes = verificar_horario(data_hora_local, duracao)
+                if conflitos and not forcar:
+                    mostrar_conflitos(conflitos, sugestoes)
+                else:
+                    try:
+                        insert_data = {
+                            "cliente_id": cliente_id,
+                            "data_hora": data_hora_utc.isoformat(),
+                            "duracao_minutos": duracao,
+                            "status": "nao_confirmado",
+                            "observacoes": observacoes.strip() if observacoes.strip() else None
+                        }
+                        resp = supabase.table("agendamentos").insert(insert_data).execute()
+                        st.success("Horário marcado com sucesso!")
+                        sincronizador.aplicar("agendamentos", resp.data)
+                    except Exception as e:
+                        st.error(f"Erro ao marcar horário: {str(e)}")
+                    else:
+                        st.rerun()
+
+@fragmento
+def fragmento_lista_agendamentos():
+    st.subheader("Agendamentos")
+    c1, c2, c3, c4 = st.columns([2, 3, 3, 1])
+    with c1:
+        periodo_lista = st.selectbox("Período", PERIODOS_LISTA, on_change=voltar_primeira_pagina_agendamentos)
+    with c2:
+        status_filtro = st.multiselect("Status", STATUS_OPCOES, format_func=get_status_texto,
+                                       placeholder="Todos", on_change=voltar_primeira_pagina_agendamentos)
+    with c3:
+        busca_ag = st.text_input("🔍 Cliente (nome ou telefone)", key="busca_lista_ag",
+                                 on_change=voltar_primeira_pagina_agendamentos)
+    with c4:
+        por_pagina_ag = st.selectbox("Por página", [10, 25, 50], key="por_pagina_ag",
+                                     on_change=voltar_primeira_pagina_agendamentos)
+
+    hoje_inicio = datetime.now(TZ_BRASIL).replace(hour=0, minute=0, second=0, microsecond=0)
+    inicio_filtro, fim_filtro, decrescente_ag = None, None, False
+    if periodo_lista == "Hoje e próximos":
+        inicio_filtro = hoje_inicio.isoformat()
+    elif periodo_lista == "Hoje":
+        inicio_filtro, fim_filtro = hoje_inicio.isoformat(), (hoje_inicio + timedelta(days=1)).isoformat()
+    elif periodo_lista == "Passados":
+        fim_filtro, decrescente_ag = datetime.now(TZ_BRASIL).isoformat(timespec="minutes"), True
+    elif periodo_lista == "Intervalo de datas":
+        datas_filtro = st.date_input("Entre", value=(hoje_inicio.date(), hoje_inicio.date() + timedelta(days=30)),
+                                     format="DD/MM/YYYY", on_change=voltar_primeira_pagina_agendamentos)
+        if len(datas_filtro) == 2:
+            inicio_filtro = datetime.combine(datas_filtro[0], datetime.min.time(), TZ_BRASIL).isoformat()
+            fim_filtro = datetime.combine(datas_filtro[1] + timedelta(days=1), datetime.min.time(), TZ_BRASIL).isoformat()
+    else:
+        decrescente_ag = True
+
+    cliente_ids_filtro = None
+    if busca_ag.strip():
+        cliente_ids_filtro = tuple(c['id'] for c in indice_busca.buscar(busca_ag, limite=LIMITE_BUSCA_LISTA))
+        if len(cliente_ids_filtro) >= LIMITE_BUSCA_LISTA:
+            st.caption(f"Busca limitada às {LIMITE_BUSCA_LISTA} primeiras clientes encontradas. Refine a busca.")
+
+    pagina_ag = st.session_state.setdefault('agendamentos_pagina', 1)
+    agendamentos, total_ag = [], 0
+    if cliente_ids_filtro != ():
+        filtros_ag = (inicio_filtro, fim_filtro, tuple(status_filtro), cliente_ids_filtro, decrescente_ag)
+        agendamentos, total_ag = carregar_pagina_agendamentos(pagina_ag - 1, por_pagina_ag, *filtros_ag, local=somente_leitura())
+        total_paginas_ag = max(1, -(-total_ag // por_pagina_ag))
+        if pagina_ag > total_paginas_ag:
+            st.session_state['agendamentos_pagina'] = pagina_ag = total_paginas_ag
+            agendamentos, total_ag = carregar_pagina_agendamentos(pagina_ag - 1, por_pagina_ag, *filtros_ag, local=somente_leitura())
+
+    if agendamentos:
+        c1, c2 = st.columns([2, 5])
+        with c1:
+            st.number_input(f"Página (de {total_paginas_ag})", min_value=1, max_value=total_paginas_ag,
+                            key='agendamentos_pagina')
+        with c2:
+            st.caption(f"{total_ag} agendamento(s)")
+
+        # Seleção da página atual (as caixas abaixo guardam o estado da execução anterior)
+        selecionados = [ag.id for ag in agendamentos if st.session_state.get(f"sel_ag_{ag.id}")]
+        colunas = st.columns([3] + [2] * len(ACOES_EM_LOTE))
+        with colunas[0]:
+            st.caption(f"{len(selecionados)} selecionado(s)")
+        for coluna, (rotulo, status) in zip(colunas[1:], ACOES_EM_LOTE.items()):
+            with coluna:
+                if st.button(rotulo, key=f"lote_{status}", disabled=bloqueado or not selecionados, use_container_width=True):
+                    try:
+                        alterados = alterar_status(selecionados, status)
+                        for ag_id in selecionados:
+                            st.session_state.pop(f"sel_ag_{ag_id}", None)
+                            st.session_state.pop(f"status_select_{ag_id}", None)
+                        st.success(f"{alterados} agendamento(s) atualizado(s)!")
+                    except:
+                        st.error("Erro ao atualizar os agendamentos selecionados.")
+                    else:
+                        apos_escrita()
+
+        for ag in agendamentos:
+            nome = ag.cliente_nome
+
+            with st.container():
+                col1, col2 = st.columns([6, 4])
+                with col1:
+                    st.checkbox(f"**{nome}**", key=f"sel_ag_{ag.id}")
+                    st.caption(f"{ag.rotulo} · 🔁 série" if ag.serie_id else ag.rotulo)
+                    st.markdown(f"<span class='{ag.info.classe}'>{ag.info.texto}</span>", unsafe_allow_html=True)
+                    if ag.observacoes:
+                        st.caption(f"📝 {ag.observacoes}")
+                with col2:
+                    novo_status = st.selectbox(
+                        "Alterar status",
+                        STATUS_OPCOES,
+                        index=STATUS_OPCOES.index(ag.status) if ag.status in STATUS_OPCOES else 0,
+                        key=f"status_select_{ag.id}",
+                        label_visibility="collapsed"
+                    )
+                    if st.button("💾 Salvar Status", key=f"save_status_{ag.id}", disabled=bloqueado):
+                        try:
+                            alterar_status([ag.id], novo_status)
+                            st.success("Status atualizado!")
+                        except:
+                            st.error("Erro ao atualizar status.")
+                        else:
+                            apos_escrita()
+
+                    if st.button("✏️ Editar", key=f"edit_ag_{ag.id}"):
+                        st.session_state[f"editando_ag_{ag.id}"] = True
+
+                    if st.button("🗑️ Deletar", key=f"del_ag_{ag.id}", type="secondary"):
+                        st.session_state[f"deletando_ag_{ag.id}"] = True
+
+                st.divider()
+
+            fragmento_editar_agendamento(ag)
+            fragmento_excluir_agendamento(ag)
+
+    else:
+        st.info("Nenhum agendamento encontrado com esses filtros.")
+
+@fragmento
+def fragmento_editar_agendamento(ag):
+    if not st.session_state.get(f"editando_ag_{ag.id}", False):
+        return
+    nome, dt = ag.cliente_nome, ag.inicio
+    with st.expander(f"✏️ Editando agendamento de {nome}", expanded=True):
+        busca_edicao = st.text_input("🔍 Trocar cliente (buscar por nome ou telefone)", key=f"busca_edit_ag_{ag.id}")
+        opcoes_edicao = {ag.cliente_id: f"{nome} - {format_telefone(ag.cliente_telefone)}"}
+        if busca_edicao:
+            opcoes_edicao.update({c['id']: rotulo_cliente(c) for c in indice_busca.buscar(busca_edicao, limite=LIMITE_BUSCA)})
+        with st.form(f"form_edit_ag_{ag.id}"):
+            novo_cliente_id = st.selectbox("Cliente", options=list(opcoes_edicao.keys()), format_func=lambda x: opcoes_edicao[x])
+            nova_data_input = st.date_input("Data", value=dt.date())
+            nova_hora_input = st.time_input("Horário", value=dt.time())
+            nova_duracao = st.number_input("Duração (minutos)", min_value=15, max_value=480, value=ag.duracao, step=15)
+            nova_data_hora_local = datetime.combine(nova_data_input, nova_hora_input, TZ_BRASIL)
+            nova_data_hora_utc = nova_data_hora_local.astimezone(timezone.utc)
+            novas_obs = st.text_area("Observações", value=ag.observacoes or "")
+            escopo = "este"
+            if ag.serie_id:
+                escopo = ESCOPOS_SERIE[st.radio("Aplicar a", list(ESCOPOS_SERIE), horizontal=True,
+                                                help="Mudar data/horário desloca as ocorrências alcançadas pelo mesmo tanto")]
+            forcar_edicao = st.checkbox("Salvar mesmo se houver conflito de horário")
+
+            c1, c2 = st.columns(2)
+            with c1:
+                enviado = st.form_submit_button("💾 Atualizar Agendamento", disabled=bloqueado)
+                if enviado and escopo != "este":
+                    deslocamento = nova_data_hora_local - ag.inicio
+                    try:
+                        alcancadas = ocorrencias_alcancadas(ag, escopo)
+                    except Exception:
+                        alcancadas = []
+                        st.error("Erro ao ler a série.")
+                    conflitos = conflitos_serie([a.inicio + deslocamento for a in alcancadas], nova_duracao,
+                                                ignorar={a.id for a in alcancadas})
+                    if conflitos and not forcar_edicao:
+                        mostrar_conflitos_serie(conflitos)
+                    elif alcancadas:
+                        try:
+                            alterados = editar_serie(ag.id, escopo, {
+                                "cliente_id": novo_cliente_id,
+                                "duracao_minutos": nova_duracao,
+                                "observacoes": novas_obs.strip() if novas_obs.strip() else None
+                            }, deslocamento)
+                            st.success(f"{alterados} agendamento(s) da série atualizado(s)!")
+                            del st.session_state[f"editando_ag_{ag.id}"]
+                        except Exception:
+                            st.error("Erro ao atualizar a série.")
+                        else:
+                            st.rerun()
+                elif enviado:
+                    conflitos, sugestoes = verificar_horario(nova_data_hora_local, nova_duracao, ignorar={ag.id})
+                    if conflitos and not forcar_edicao:
+                        mostrar_conflitos(conflitos, sugestoes)
+                    else:
+                        try:
+                            resp = supabase.table("agendamentos").update({
+                                "cliente_id": novo_cliente_id,
+                                "data_hora": nova_data_hora_utc.isoformat(),
+                                "duracao_minutos": nova_duracao,
+                                "observacoes": novas_obs.strip() if novas_obs.strip() else None
+                            }).eq("id", ag.id).execute()
+                            st.success("Agendamento atualizado!")
+                            sincronizador.aplicar("agendamentos", resp.data)
+                            del st.session_state[f"editando_ag_{ag.id}"]
+                        except Exception:
+                            st.error("Erro ao atualizar.")
+                        else:
+                            st.rerun()
+            with c2:
+                if st.form_submit_button("Cancelar"):
+                    del st.session_state[f"editando_ag_{ag.id}"]
+                    rerun_fragmento()
+
+@fragmento
+def fragmento_excluir_agendamento(ag):
+    if not st.session_state.get(f"deletando_ag_{ag.id}", False):
+        return
+    nome = ag.cliente_nome
+    with st.expander(f"🗑️ Confirmar exclusão de {nome}", expanded=True):
+        st.error(f"Tem certeza que deseja **deletar permanentemente** o agendamento de {nome} em {ag.rotulo}?")
+        escopo = "este"
+        if ag.serie_id:
+            escopo = ESCOPOS_SERIE[st.radio("Aplicar a", list(ESCOPOS_SERIE), horizontal=True, key=f"escopo_del_ag_{ag.id}")]
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            if st.button("🗑️ Sim, deletar", key=f"confirm_del_ag_{ag.id}", type="secondary", disabled=bloqueado):
+                try:
+                    if escopo == "este":
+                        excluir("agendamentos", "id", ag.id)
+                        st.success("Agendamento deletado com sucesso!")
+                    else:
+                        st.success(f"{editar_serie(ag.id, escopo, excluir_linhas=True)} agendamento(s) deletado(s)!")
+                    del st.session_state[f"deletando_ag_{ag.id}"]
+                except Exception:
+                    st.error("Erro ao deletar.")
+                else:
+                    st.rerun()
+        with c2:
+            if ag.serie_id and st.button("❌ Só cancelar", key=f"cancelar_serie_ag_{ag.id}", disabled=bloqueado,
+                                         help="Mantém o(s) agendamento(s) com status Cancelado"):
+                try:
+                    st.success(f"{editar_serie(ag.id, escopo, {'status': 'cancelado'})} agendamento(s) cancelado(s)!")
+                    del st.session_state[f"deletando_ag_{ag.id}"]
+                except Exception:
+                    st.error("Erro ao cancelar.")
+                else:
+                    st.rerun()
+        with c3:
+            if st.button("Cancelar"):
+                del st.session_state[f"deletando_ag_{ag.id}"]
+                rerun_fragmento()
 
-total_clientes = contar_clientes()
-total_aniversarios = contar_aniversarios()
-total_agendamentos_hoje = contar_agendamentos_hoje()
 
 # ==================== INÍCIO ====================
 if menu == "🏠 Início":
+    total_clientes, total_agendamentos_hoje, total_aniversarios = metricas_inicio()
     col1, col2, col3 = st.columns(3)
     with col1:
         st.markdown(f'<div class="card"><h3>👥 Clientes</h3><h2 style="color:#FFB6C1;">{total_clientes}</h2><p>cadastradas</p></div>', unsafe_allow_html=True)
@@ -210,293 +1278,83 @@ if menu == "🏠 Início":
 # ==================== CLIENTES ====================
 elif menu == "👩‍🦰 Clientes":
     st.header("👩‍🦰 Gerenciar Clientes")
-    tab1, tab2 = st.tabs(["✨ Nova Cliente", "📋 Todas as Clientes"])
+    tab1, tab2, tab3 = st.tabs(["✨ Nova Cliente", "📋 Todas as Clientes", "📥 Importar / Exportar"])
 
     with tab1:
-        with st.form("cadastro_cliente", clear_on_submit=True):
-            st.subheader("Cadastrar Nova Cliente")
-            nome = st.text_input("Nome completo *", placeholder="Ex: Maria Silva")
-            telefone = st.text_input("Telefone *", placeholder="(11) 91234-5678")
-            data_nascimento = st.date_input("Data de nascimento", value=None, min_value=date(1900,1,1))
-            observacoes = st.text_area("Observações")
-
-            if st.form_submit_button("💾 Salvar Cliente"):
-                if not nome.strip() or not telefone.strip():
-                    st.error("⚠️ Nome e telefone são obrigatórios!")
-                else:
-                    try:
-                        data = {
-                            "nome": nome.strip(),
-                            "telefone": telefone.strip(),
-                            "data_nascimento": str(data_nascimento) if data_nascimento else None,
-                            "observacoes": observacoes.strip() if observacoes.strip() else None
-                        }
-                        supabase.table("clientes").insert(data).execute()
-                        st.success(f"✅ {nome} cadastrada com sucesso!")
-                        st.cache_data.clear()
-                        st.rerun()
-                    except Exception as e:
-                        st.error("Erro ao salvar cliente.")
+        fragmento_nova_cliente()
 
     with tab2:
-        st.subheader("Todas as Clientes")
-        try:
-            response = supabase.table("clientes").select("*").order("nome").execute()
-            if not response.data:
-                st.info("Nenhuma cliente cadastrada ainda.")
-            else:
-                df = pd.DataFrame(response.data)
-                busca = st.text_input("🔍 Buscar por nome ou telefone")
-                if busca:
-                    mask = df['nome'].str.contains(busca, case=False, na=False) | df['telefone'].str.contains(busca, case=False, na=False)
-                    df = df[mask]
-
-                for _, row in df.iterrows():
-                    col1, col2, col3, col4, col5, col6 = st.columns([3, 2, 2, 3, 1, 1])
-                    with col1:
-                        st.write(row['nome'])
-                    with col2:
-                        st.write(format_telefone(row['telefone']))
-                    with col3:
-                        st.write(format_data(row['data_nascimento']))
-                    with col4:
-                        st.write(row['observacoes'] or "-")
-                    with col5:
-                        if st.button("✏️", key=f"edit_{row['id']}"):
-                            st.session_state['cliente_edit'] = row.to_dict()
-                    with col6:
-                        if st.button("🗑️", key=f"del_{row['id']}", type="secondary"):
-                            st.session_state['cliente_del_id'] = row['id']
-                            st.session_state['cliente_del_nome'] = row['nome']
-
-                if 'cliente_edit' in st.session_state:
-                    cliente = st.session_state['cliente_edit']
-                    with st.expander(f"✏️ Editando: {cliente['nome']}", expanded=True):
-                        with st.form("form_edit"):
-                            novo_nome = st.text_input("Nome *", value=cliente['nome'])
-                            novo_tel = st.text_input("Telefone *", value=cliente['telefone'], placeholder="(11) 91234-5678")
-                            nova_data = date.fromisoformat(cliente['data_nascimento']) if cliente['data_nascimento'] else None
-                            novo_nasc = st.date_input("Data de nascimento", value=nova_data)
-                            novas_obs = st.text_area("Observações", value=cliente['observacoes'] or "")
-
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                if st.form_submit_button("💾 Atualizar"):
-                                    if not novo_nome.strip() or not novo_tel.strip():
-                                        st.error("Campos obrigatórios!")
-                                    else:
-                                        try:
-                                            supabase.table("clientes").update({
-                                                "nome": novo_nome.strip(),
-                                                "telefone": novo_tel.strip(),
-                                                "data_nascimento": str(novo_nasc) if novo_nasc else None,
-                                                "observacoes": novas_obs.strip() if novas_obs.strip() else None
-                                            }).eq("id", cliente['id']).execute()
-                                            st.success("Cliente atualizada!")
-                                            st.cache_data.clear()
-                                            del st.session_state['cliente_edit']
-                                            st.rerun()
-                                        except:
-                                            st.error("Erro ao atualizar.")
-                            with c2:
-                                if st.form_submit_button("Cancelar"):
-                                    del st.session_state['cliente_edit']
-                                    st.rerun()
-
-                if 'cliente_del_id' in st.session_state:
-                    nome = st.session_state['cliente_del_nome']
-                    with st.expander("🗑️ Confirmação de Exclusão", expanded=True):
-                        st.error(f"Tem certeza que deseja deletar **{nome}**?")
-                        c1, c2 = st.columns(2)
-                        with c1:
-                            if st.button("🗑️ Sim, deletar", type="secondary"):
-                                try:
-                                    supabase.table("clientes").delete().eq("id", st.session_state['cliente_del_id']).execute()
-                                    st.success(f"{nome} removida com sucesso.")
-                                    st.cache_data.clear()
-                                    del st.session_state['cliente_del_id']
-                                    del st.session_state['cliente_del_nome']
-                                    st.rerun()
-                                except:
-                                    st.error("Erro ao deletar.")
-                        with c2:
-                            if st.button("Cancelar"):
-                                del st.session_state['cliente_del_id']
-                                del st.session_state['cliente_del_nome']
-                                st.rerun()
+        fragmento_lista_clientes()
 
-        except Exception as e:
-            st.error("Erro ao carregar clientes.")
+    with tab3:
+        fragmento_importar_exportar()
 
 # ==================== AGENDA ====================
 elif menu == "📅 Agenda":
     st.header("📅 Agenda de Atendimentos")
 
-    clientes_dict = carregar_clientes()
-    agendamentos = carregar_agendamentos()
-
-    # Eventos para o calendário
-    events = []
-    for ag in agendamentos:
-        dt_iso = ag['data_hora']
-        dt = datetime.fromisoformat(dt_iso).astimezone(TZ_BRASIL)
-        color = {
-            "nao_confirmado": "#888888",
-            "confirmado": "#28a745",
-            "realizado": "#D4AF37",
-            "cancelado": "#dc3545"
-        }.get(ag['status'], "#888888")
-        events.append({
-            "title": f"{ag['clientes']['nome']} ({dt.strftime('%H:%M')})",
-            "start": dt.isoformat(),
-            "end": (dt + timedelta(hours=1)).isoformat(),
-            "backgroundColor": color,
-            "borderColor": color,
-        })
-
-    calendar_options = {
-        "headerToolbar": {
-            "left": "prev,next today",
-            "center": "title",
-            "right": "dayGridMonth,timeGridWeek,timeGridDay"
-        },
-        "initialView": "dayGridMonth",
-        "selectable": True,
-        "height": 800,
-        "contentHeight": 750,
-        "locale": "pt-br",
-        "buttonText": {"today": "Hoje", "month": "Mês", "week": "Semana", "day": "Dia"},
-        "slotMinTime": "08:00:00",
-        "slotMaxTime": "21:00:00",
-    }
-
-    calendar(events=events, options=calendar_options, key="main_calendar")
+    # Período visível do calendário, mudado pelos botões de navegação
+    if 'agenda_periodo' not in st.session_state:
+        st.session_state['agenda_periodo'] = periodo_padrao()
+    fragmento_calendario()
 
     tab1, tab2 = st.tabs(["✨ Nova Marcação", "📋 Todos os Agendamentos"])
 
     with tab1:
-        with st.form("nova_marcacao"):
-            st.subheader("Marcar Novo Horário")
-            if not clientes_dict:
-                st.warning("Cadastre pelo menos uma cliente antes.")
-            else:
-                cliente_id = st.selectbox("Cliente *", options=list(clientes_dict.keys()), format_func=lambda x: clientes_dict[x])
-                data = st.date_input("Data", value=date.today())
-                hora = st.time_input("Horário", value=datetime.now(TZ_BRASIL).replace(minute=0, second=0) + timedelta(hours=1))
-                data_hora_local = datetime.combine(data, hora)
-                data_hora_utc = data_hora_local.astimezone(timezone.utc)
-                observacoes = st.text_area("Observações do agendamento")
-
-                if st.form_submit_button("📅 Marcar Horário"):
-                    try:
-                        insert_data = {
-                            "cliente_id": cliente_id,
-                            "data_hora": data_hora_utc.isoformat(),
-                            "status": "nao_confirmado",
-                            "observacoes": observacoes.strip() if observacoes.strip() else None
-                        }
-                        supabase.table("agendamentos").insert(insert_data).execute()
-                        st.success("Horário marcado com sucesso!")
-                        st.cache_data.clear()
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Erro ao marcar horário: {str(e)}")
+        fragmento_nova_marcacao()
 
     with tab2:
-        st.subheader("Todos os Agendamentos")
-        if agendamentos:
-            for ag in sorted(agendamentos, key=lambda x: x['data_hora'], reverse=True):
-                dt_iso = ag['data_hora']
-                dt = datetime.fromisoformat(dt_iso).astimezone(TZ_BRASIL)
-                nome = ag['clientes']['nome']
-                status_txt = get_status_texto(ag['status'])
-
-                with st.container():
-                    col1, col2 = st.columns([6, 4])
-                    with col1:
-                        st.markdown(f"**{nome}**")
-                        st.caption(format_data_hora(ag['data_hora']))
-                        st.markdown(f"<span class='{get_status_class(ag['status'])}'>{status_txt}</span>", unsafe_allow_html=True)
-                        if ag['observacoes']:
-                            st.caption(f"📝 {ag['observacoes']}")
-                    with col2:
-                        novo_status = st.selectbox(
-                            "Alterar status",
-                            ["nao_confirmado", "confirmado", "realizado", "cancelado"],
-                            index=["nao_confirmado", "confirmado", "realizado", "cancelado"].index(ag['status']),
-                            key=f"status_select_{ag['id']}",
-                            label_visibility="collapsed"
-                        )
-                        if st.button("💾 Salvar Status", key=f"save_status_{ag['id']}"):
-                            try:
-                                supabase.table("agendamentos").update({"status": novo_status}).eq("id", ag['id']).execute()
-                                if novo_status == "realizado":
-                                    supabase.table("clientes").update({"ultimo_atendimento": datetime.now(timezone.utc).isoformat()}).eq("id", ag['cliente_id']).execute()
-                                st.success("Status atualizado!")
-                                st.cache_data.clear()
-                                st.rerun()
-                            except:
-                                st.error("Erro ao atualizar status.")
-
-                        if st.button("✏️ Editar", key=f"edit_ag_{ag['id']}"):
-                            st.session_state[f"editando_ag_{ag['id']}"] = True
-
-                        if st.button("🗑️ Deletar", key=f"del_ag_{ag['id']}", type="secondary"):
-                            st.session_state[f"deletando_ag_{ag['id']}"] = True
-
-                    st.divider()
-
-                if st.session_state.get(f"editando_ag_{ag['id']}", False):
-                    with st.expander(f"✏️ Editando agendamento de {nome}", expanded=True):
-                        with st.form(f"form_edit_ag_{ag['id']}"):
-                            novo_cliente_id = st.selectbox("Cliente", options=list(clientes_dict.keys()), format_func=lambda x: clientes_dict[x], index=list(clientes_dict.keys()).index(ag['cliente_id']))
-                            nova_data_input = st.date_input("Data", value=dt.date())
-                            nova_hora_input = st.time_input("Horário", value=dt.time())
-                            nova_data_hora_local = datetime.combine(nova_data_input, nova_hora_input)
-                            nova_data_hora_utc = nova_data_hora_local.astimezone(timezone.utc)
-                            novas_obs = st.text_area("Observações", value=ag['observacoes'] or "")
-
-                            c1, c2 = st.columns(2)
-                            with c1:
-                                if st.form_submit_button("💾 Atualizar Agendamento"):
-                                    try:
-                                        supabase.table("agendamentos").update({
-                                            "cliente_id": novo_cliente_id,
-                                            "data_hora": nova_data_hora_utc.isoformat(),
-                                            "observacoes": novas_obs.strip() if novas_obs.strip() else None
-                                        }).eq("id", ag['id']).execute()
-                                        st.success("Agendamento atualizado!")
-                                        st.cache_data.clear()
-                                        del st.session_state[f"editando_ag_{ag['id']}"]
-                                        st.rerun()
-                                    except:
-                                        st.error("Erro ao atualizar.")
-                            with c2:
-                                if st.form_submit_button("Cancelar"):
-                                    del st.session_state[f"editando_ag_{ag['id']}"]
-                                    st.rerun()
-
-                if st.session_state.get(f"deletando_ag_{ag['id']}", False):
-                    with st.expander(f"🗑️ Confirmar exclusão de {nome}", expanded=True):
-                        st.error(f"Tem certeza que deseja **deletar permanentemente** o agendamento de {nome} em {format_data_hora(ag['data_hora'])}?")
-                        c1, c2 = st.columns(2)
-                        with c1:
-                            if st.button("🗑️ Sim, deletar", key=f"confirm_del_ag_{ag['id']}", type="secondary"):
-                                try:
-                                    supabase.table("agendamentos").delete().eq("id", ag['id']).execute()
-                                    st.success("Agendamento deletado com sucesso!")
-                                    st.cache_data.clear()
-                                    del st.session_state[f"deletando_ag_{ag['id']}"]
-                                    st.rerun()
-                                except:
-                                    st.error("Erro ao deletar.")
-                        with c2:
-                            if st.button("Cancelar"):
-                                del st.session_state[f"deletando_ag_{ag['id']}"]
-                                st.rerun()
+        fragmento_lista_agendamentos()
 
-        else:
-            st.info("Nenhum agendamento cadastrado ainda.")
+# ==================== ANÁLISES ====================
+elif menu == "📊 Análises":
+    st.header("📊 Análises de Atendimento")
+    hoje = datetime.now(TZ_BRASIL).date()
+    qtd_meses = st.selectbox("Período", [3, 6, 12, 24], index=1, format_func=lambda n: f"Últimos {n} meses")
+    resumo = pd.DataFrame(resumo_atendimentos.por_mes(ultimos_meses(hoje, qtd_meses), hoje))
+
+    total = resumo["agendamentos"].sum()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Agendamentos", int(total))
+    c2.metric("Cancelamentos", f"{resumo['cancelados'].sum() / total:.1%}" if total else "-")
+    c3.metric("Faltas", f"{resumo['faltas'].sum() / total:.1%}" if total else "-",
+              help="Agendamentos que já passaram sem serem marcados como realizados ou cancelados")
+    c4.metric("Visitas por cliente (mês atual)", f"{resumo['visitas_por_cliente'].iloc[-1]:.2f}")
+
+    st.subheader("Agendamentos por mês")
+    st.bar_chart(resumo.set_index("mes")[["realizados", "cancelados", "faltas"]],
+                 color=[STATUS["realizado"].cor, STATUS["cancelado"].cor, STATUS_PADRAO.cor])
+    st.subheader("Taxas e visitas por mês")
+    taxas = resumo.set_index("mes")
+    taxas = pd.DataFrame({
+        "Cancelamento (%)": (taxas["cancelados"] / taxas["agendamentos"].where(taxas["agendamentos"] > 0) * 100).round(1),
+        "Faltas (%)": (taxas["faltas"] / taxas["agendamentos"].where(taxas["agendamentos"] > 0) * 100).round(1),
+        "Visitas por cliente": taxas["visitas_por_cliente"],
+    })
+    st.line_chart(taxas)
+    st.dataframe(resumo.rename(columns={
+        "mes": "Mês", "agendamentos": "Agendamentos", "realizados": "Realizados", "cancelados": "Cancelados",
+        "faltas": "Faltas", "clientes_atendidas": "Clientes atendidas", "visitas_por_cliente": "Visitas por cliente",
+    }), hide_index=True, use_container_width=True)
+
+    st.subheader(f"💖 Clientes sem voltar há mais de {config.retorno_dias} dias")
+    limite_retorno = datetime.now(TZ_BRASIL) - timedelta(days=config.retorno_dias)
+    atrasadas, total_atrasadas = resumo_atendimentos.atrasadas(limite_retorno)
+    if not atrasadas:
+        st.info("Nenhuma cliente com retorno atrasado. 🎉")
+    else:
+        linhas_atrasadas = []
+        for cliente_id, ultimo in atrasadas:
+            cliente = sincronizador.obter("clientes", cliente_id) or {}
+            linhas_atrasadas.append({
+                "Nome": cliente.get('nome', "-"),
+                "Telefone": format_telefone(cliente.get('telefone')),
+                "Último atendimento": ultimo.strftime("%d/%m/%Y"),
+                "Dias sem vir": (hoje - ultimo.date()).days,
+            })
+        st.dataframe(pd.DataFrame(linhas_atrasadas), hide_index=True, use_container_width=True)
+        if total_atrasadas > len(atrasadas):
+            st.caption(f"Mostrando as {len(atrasadas)} há mais tempo sem vir, de {total_atrasadas}.")
 
 # ==================== NOTIFICAÇÕES ====================
 elif menu == "🔔 Notificações":
@@ -511,39 +1369,30 @@ elif menu == "🔔 Notificações":
     st.subheader("Teste Manual")
     mensagem = st.text_input("Mensagem de teste", value="Olá Claudia! As notificações estão funcionando perfeitamente! ✨💖")
 
+    caixa_saida = obter_caixa_saida()
     if st.button("Enviar Push de Teste"):
-        import requests
-        import json
-
-        payload = {
-            "app_id": onesignal_app_id,
-            "included_segments": ["All"],
-            "contents": {"pt": mensagem},
-            "headings": {"pt": "Depilação Claudia Ferraz"},
-            "name": "Teste Manual"
-        }
-
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "Authorization": f"Basic {onesignal_rest_key}"  # Basic para Authentication Key
-        }
-
         try:
-            response = requests.post(
-                "https://onesignal.com/api/v1/notifications",
-                headers=headers,
-                data=json.dumps(payload)
-            )
-
-            if response.status_code == 200:
-                st.success("✅ Notificação enviada com sucesso! Checa o celular da Claudia agora! 📱✨")
-                st.balloons()
-                st.json(response.json())
-            else:
-                st.error(f"Erro HTTP {response.status_code}")
-                st.code(response.text)
+            caixa_saida.enfileirar("Depilação Claudia Ferraz", mensagem, segmentos=["All"], nome="Teste Manual")
+            st.success("✅ Notificação na fila! Ela será enviada em instantes. Acompanhe o status abaixo. 📱✨")
         except Exception as e:
-            st.error(f"Erro ao enviar: {str(e)}")
+            st.error(f"Erro ao enfileirar: {str(e)}")
+
+    st.subheader("Caixa de Saída")
+    if st.button("🔄 Atualizar status"):
+        st.rerun()
+    mensagens = caixa_saida.listar()
+    if mensagens:
+        st.dataframe(pd.DataFrame([{
+            "Enviada em": datetime.fromtimestamp(m["criado_em"], TZ_BRASIL).strftime("%d/%m %H:%M"),
+            "Nome": m["nome"] or "-",
+            "Mensagem": m["conteudo"],
+            "Status": m["status"],
+            "Lotes": f"{m['enviados']}/{m['lotes']}",
+            "Tentativas": m["tentativas"],
+            "Erro": m["erro"] or "",
+        } for m in mensagens]), hide_index=True, use_container_width=True)
+    else:
+        st.caption("Nenhuma notificação enviada ainda.")
 
     # Integração OneSignal Web Push (versão que funciona em Streamlit/Render)
     st.components.v1.html(
@@ -568,12 +1417,93 @@ elif menu == "🔔 Notificações":
 
     st.markdown("---")
 
-    st.subheader("Notificações Automáticas (em desenvolvimento)")
-    st.info("Em breve: parabéns automáticos, lembretes de agendamento e alerta de retorno.")
+    st.subheader("Notificações Automáticas")
+    st.caption(f"Lembrete {config.lembrete_horas}h antes de cada horário • parabéns às 9h no dia do aniversário • "
+               f"alerta de retorno {config.retorno_dias} dias após o último atendimento")
+    proximos_disparos = agendador.pendentes()
+    if proximos_disparos:
+        st.dataframe(pd.DataFrame([{
+            "Quando": d["quando"].strftime("%d/%m/%Y %H:%M"),
+            "Tipo": d["titulo"],
+            "Mensagem": d["conteudo"],
+        } for d in proximos_disparos]), hide_index=True, use_container_width=True)
+    else:
+        st.caption("Nenhuma notificação automática programada.")
+
+    st.subheader("🎂 Aniversariantes")
+    indice_aniversarios = carregar_indice_aniversarios()
+    hoje = datetime.now(TZ_BRASIL).date()
+    aba_hoje, aba_semana, aba_mes = st.tabs(["Hoje", "Próximos 7 dias", "Este mês"])
+    with aba_hoje:
+        aniversariantes = indice_aniversarios.hoje(hoje)
+        if aniversariantes:
+            for c in aniversariantes:
+                st.write(f"🎉 {c['nome']} - {format_telefone(c['telefone'])}")
+        else:
+            st.caption("Nenhuma aniversariante hoje.")
+    for aba, lista in ((aba_semana, indice_aniversarios.semana(hoje)), (aba_mes, indice_aniversarios.mes(hoje))):
+        with aba:
+            if lista:
+                for dia, c in lista:
+                    st.write(f"{dia.strftime('%d/%m')} • {c['nome']} - {format_telefone(c['telefone'])}")
+            else:
+                st.caption("Nenhuma aniversariante no período.")
 
 elif menu == "⚙️ Configurações":
     st.header("⚙️ Configurações")
-    st.info("Em desenvolvimento...")
+
+    st.subheader("Conexões")
+    st.caption(f"Pool HTTP: até {config.max_conexoes} conexões ({config.max_keepalive} mantidas abertas) • timeout {config.timeout:g}s")
+    if st.button("🩺 Verificar conexões"):
+        st.dataframe(pd.DataFrame(verificar_saude(supabase, config, obter_sessao_http())), hide_index=True, use_container_width=True)
+
+    st.subheader("Sincronização")
+    if sincronizador.ultima_sincronizacao:
+        ultima = datetime.fromtimestamp(sincronizador.ultima_sincronizacao, TZ_BRASIL).strftime("%d/%m %H:%M:%S")
+    else:
+        ultima = "nunca"
+    st.caption(f"{'📴 somente leitura' if bloqueado else '🟢 online'} • a cada {config.sync_intervalo:g}s • última: {ultima} • "
+               f"{sincronizador.contar('clientes')} clientes, {sincronizador.contar('agendamentos')} agendamentos em memória • "
+               f"{sincronizador.alteracoes_recebidas} alterações recebidas")
+    if sincronizador.ultimo_erro:
+        st.warning(f"Última falha: {sincronizador.ultimo_erro}")
+
+    st.subheader("Cache")
+    estatisticas = cache.estatisticas()
+    if estatisticas:
+        st.dataframe(pd.DataFrame(estatisticas).sort_values("tempo_calculo_ms", ascending=False),
+                     hide_index=True, use_container_width=True)
+    else:
+        st.caption("Nenhuma leitura em cache ainda.")
+
+    st.subheader("Desempenho")
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        st.button("🔄 Atualizar painel")
+    with c2:
+        st.download_button("⬇️ JSON", metricas.exportar_json(estatisticas), "metricas.json", "application/json")
+    with c3:
+        st.download_button("⬇️ Prometheus", metricas.exportar_prometheus(estatisticas), "metricas.prom", "text/plain")
+
+    reruns = metricas.linhas("rerun")
+    for linha in reruns:
+        linha["widgets_por_rerun"] = round(linha.pop("widgets", 0) / linha["chamadas"], 1)
+    for titulo, linhas, vazio in (
+        ("Reruns por página", reruns, "Nenhum rerun medido ainda."),
+        ("Fragmentos (reruns parciais)", metricas.linhas("fragmento"), "Nenhum fragmento executado ainda."),
+        ("Chamadas ao Supabase (tabela / operação)", metricas.linhas("supabase"), "Nenhuma chamada ao banco ainda."),
+        ("Envios ao OneSignal", metricas.linhas("onesignal"), "Nenhum envio ainda."),
+    ):
+        st.markdown(f"**{titulo}**")
+        if linhas:
+            st.dataframe(pd.DataFrame(linhas), hide_index=True, use_container_width=True)
+        else:
+            st.caption(vazio)
 
 st.markdown("---")
-st.caption("© 2025 Depilação Claudia Ferraz • Sistema exclusivo e personalizado")
\ No newline at end of file
+st.caption("© 2025 Depilação Claudia Ferraz • Sistema exclusivo e personalizado")
+
+# Reruns interrompidos por st.rerun()/st.stop() não chegam aqui e ficam fora da medida
+contexto = get_script_run_ctx()
+metricas.registrar("rerun", {"pagina": menu}, time.perf_counter() - inicio_rerun,
+                   widgets=len(contexto.widget_ids_this_run) if contexto else 0)
\ No newline at end of file
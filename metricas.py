@@ -0,0 +1,157 @@
+# Arquivo: metricas.py
+# Instrumentação: tempo de cada rerun, de cada chamada ao Supabase e ao OneSignal
+#
+# Cada série é identificada por nome + rótulos (ex.: supabase {tabela, operacao}) e
+# guarda contagem, soma, máximo, erros, buckets cumulativos (formato Prometheus) e
+# as últimas amostras para p50/p95. Tudo em memória, compartilhado pelo processo.
+
+import json
+import threading
+import time
+from collections import deque
+
+import httpx
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AMOSTRAS_RECENTES = 200
+OPERACOES_HTTP = {"GET": "select", "HEAD": "count", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+class Serie:
+    __slots__ = ("contagem", "soma", "maximo", "erros", "buckets", "recentes", "extras")
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.erros = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.recentes = deque(maxlen=AMOSTRAS_RECENTES)
+        self.extras = {}
+
+    def percentil(self, p):
+        if not self.recentes:
+            return None
+        ordenadas = sorted(self.recentes)
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+class Metricas:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self.inicio = time.time()
+
+    def registrar(self, nome, rotulos, segundos, sucesso=True, **extras):
+        """Uma medida; `extras` (ex.: bytes=1234) são somados na série."""
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = Serie()
+            serie.contagem += 1
+            serie.soma += segundos
+            serie.maximo = max(serie.maximo, segundos)
+            serie.erros += not sucesso
+            for i, limite in enumerate(BUCKETS):
+                if segundos <= limite:
+                    serie.buckets[i] += 1
+            serie.recentes.append(segundos)
+            for extra, valor in extras.items():
+                serie.extras[extra] = serie.extras.get(extra, 0) + valor
+
+    def linhas(self, nome):
+        """Resumo das séries de `nome` para exibição (tempos em ms)."""
+        with self._lock:
+            series = [(dict(rotulos), s) for (n, rotulos), s in self._series.items() if n == nome]
+            linhas = []
+            for rotulos, s in series:
+                linhas.append({
+                    **rotulos,
+                    "chamadas": s.contagem,
+                    "erros": s.erros,
+                    "media_ms": round(s.soma / s.contagem * 1000, 1),
+                    "p50_ms": round(s.percentil(0.5) * 1000, 1),
+                    "p95_ms": round(s.percentil(0.95) * 1000, 1),
+                    "max_ms": round(s.maximo * 1000, 1),
+                    "total_s": round(s.soma, 2),
+                    **s.extras,
+                })
+        return sorted(linhas, key=lambda l: l["total_s"], reverse=True)
+
+    def exportar_json(self, cache=None):
+        with self._lock:
+            nomes = sorted({n for n, _r in self._series})
+        dados = {"desde": self.inicio, "series": {n: self.linhas(n) for n in nomes}}
+        if cache is not None:
+            dados["cache"] = cache
+        return json.dumps(dados, ensure_ascii=False, indent=1)
+
+    def exportar_prometheus(self, cache=None):
+        """Texto no formato de exposição do Prometheus (histogramas em segundos)."""
+        saida = []
+        with self._lock:
+            por_nome = {}
+            for (nome, rotulos), serie in self._series.items():
+                por_nome.setdefault(nome, []).append((rotulos, serie))
+            for nome, series in sorted(por_nome.items()):
+                metrica = f"depilacao_{nome}_segundos"
+                saida.append(f"# TYPE {metrica} histogram")
+                for rotulos, s in series:
+                    for limite, acumulado in zip(BUCKETS, s.buckets):
+                        saida.append(f"{metrica}_bucket{_rotulos(rotulos, le=limite)} {acumulado}")
+                    saida.append(f"{metrica}_bucket{_rotulos(rotulos, le='+Inf')} {s.contagem}")
+                    saida.append(f"{metrica}_sum{_rotulos(rotulos)} {s.soma:.6f}")
+                    saida.append(f"{metrica}_count{_rotulos(rotulos)} {s.contagem}")
+                saida.append(f"# TYPE depilacao_{nome}_erros_total counter")
+                for rotulos, s in series:
+                    saida.append(f"depilacao_{nome}_erros_total{_rotulos(rotulos)} {s.erros}")
+                for extra in sorted({e for _r, s in series for e in s.extras}):
+                    saida.append(f"# TYPE depilacao_{nome}_{extra}_total counter")
+                    for rotulos, s in series:
+                        saida.append(f"depilacao_{nome}_{extra}_total{_rotulos(rotulos)} {s.extras.get(extra, 0)}")
+        if cache:
+            saida.append("# TYPE depilacao_cache_hits_total counter")
+            saida.extend(f"depilacao_cache_hits_total{_rotulos((('funcao', l['funcao']),))} {l['hits']}" for l in cache)
+            saida.append("# TYPE depilacao_cache_misses_total counter")
+            saida.extend(f"depilacao_cache_misses_total{_rotulos((('funcao', l['funcao']),))} {l['misses']}" for l in cache)
+        return "\n".join(saida) + "\n"
+
+
+def _rotulos(rotulos, **extras):
+    pares = list(rotulos) + [(k, v) for k, v in extras.items()]
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class TransporteMedido(httpx.BaseTransport):
+    """Envolve o transporte do PostgREST e mede cada chamada por tabela e operação."""
+
+    def __init__(self, transporte, metricas):
+        self.transporte = transporte
+        self.metricas = metricas
+
+    def handle_request(self, request):
+        caminho = request.url.path.rstrip("/")
+        rotulos = {"tabela": caminho.rsplit("/", 1)[-1],
+                   "operacao": "rpc" if "/rpc/" in caminho else OPERACOES_HTTP.get(request.method, request.method.lower())}
+        inicio = time.perf_counter()
+        try:
+            resposta = self.transporte.handle_request(request)
+        except Exception:
+            self.metricas.registrar("supabase", rotulos, time.perf_counter() - inicio, sucesso=False)
+            raise
+        # Lê o corpo aqui para o tempo incluir a transferência (o cliente leria logo em seguida)
+        resposta.read()
+        self.metricas.registrar("supabase", rotulos, time.perf_counter() - inicio,
+                                sucesso=resposta.status_code < 400, bytes=len(resposta.content))
+        return resposta
+
+    def close(self):
+        self.transporte.close()
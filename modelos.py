@@ -0,0 +1,80 @@
+# Arquivo: modelos.py
+# Modelos tipados: cada agendamento é convertido uma única vez, na leitura do banco
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+# Timezone de Brasília
+TZ_BRASIL = timezone(timedelta(hours=-3))
+
+
+def chave_mes(data_iso):
+    """Mês (horário de Brasília) de um ISO do banco, ex.: "2026-10": chave de cache e de partição."""
+    return datetime.fromisoformat(data_iso).astimezone(TZ_BRASIL).strftime("%Y-%m")
+
+
+@dataclass(frozen=True, slots=True)
+class StatusInfo:
+    texto: str
+    classe: str
+    cor: str
+
+
+STATUS = {
+    "nao_confirmado": StatusInfo("Não Confirmado", "status-nao", "#888888"),
+    "confirmado": StatusInfo("Confirmado", "status-confirmado", "#28a745"),
+    "realizado": StatusInfo("Realizado", "status-realizado", "#D4AF37"),
+    "cancelado": StatusInfo("Cancelado", "status-cancelado", "#dc3545"),
+}
+STATUS_PADRAO = STATUS["nao_confirmado"]
+
+# Duração de um atendimento quando o agendamento não informa (minutos)
+DURACAO_PADRAO = 60
+
+
+@dataclass(frozen=True, slots=True)
+class Agendamento:
+    id: int
+    cliente_id: int
+    cliente_nome: str
+    cliente_telefone: str
+    status: str
+    observacoes: str | None
+    data_hora: str       # ISO como veio do banco (UTC)
+    inicio: datetime     # horário de Brasília
+    fim: datetime
+    duracao: int         # minutos
+    dia: date
+    mes: str             # chave de cache do mês, ex.: "2026-10"
+    hora: str            # "14:30"
+    rotulo: str          # "17/10/2026 às 14:30"
+    info: StatusInfo
+    serie_id: str | None  # agendamentos da mesma série (retorno a cada N semanas)
+
+    @classmethod
+    def de_registro(cls, registro):
+        inicio = datetime.fromisoformat(registro['data_hora']).astimezone(TZ_BRASIL)
+        cliente = registro.get('clientes') or {}
+        duracao = registro.get('duracao_minutos') or DURACAO_PADRAO
+        return cls(
+            id=registro['id'],
+            cliente_id=registro['cliente_id'],
+            cliente_nome=cliente.get('nome') or "-",
+            cliente_telefone=cliente.get('telefone') or "",
+            status=registro['status'],
+            observacoes=registro.get('observacoes'),
+            data_hora=registro['data_hora'],
+            inicio=inicio,
+            fim=inicio + timedelta(minutes=duracao),
+            duracao=duracao,
+            dia=inicio.date(),
+            mes=inicio.strftime("%Y-%m"),
+            hora=inicio.strftime("%H:%M"),
+            rotulo=inicio.strftime("%d/%m/%Y às %H:%M"),
+            info=STATUS.get(registro['status'], STATUS_PADRAO),
+            serie_id=registro.get('serie_id'),
+        )
+
+
+def converter_agendamentos(registros):
+    return [Agendamento.de_registro(r) for r in registros]
@@ -0,0 +1,262 @@
+# Arquivo: notificacoes.py
+# Caixa de saída de notificações push (SQLite) e despachante em segundo plano
+#
+# A página só enfileira a mensagem e volta na hora; uma thread envia para a API
+# REST do OneSignal em lotes de destinatários, com limite de taxa e novas tentativas
+# com backoff. Cada lote tem status próprio e sobrevive a reinícios do processo.
+# A URL da API é configurável (ONESIGNAL_API_URL) para testar contra um servidor local.
+
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+# Limite de destinatários por requisição da API do OneSignal
+LOTE_MAXIMO = 2000
+# Base das chaves de idempotência derivadas da chave da mensagem (uuid5): o mesmo
+# disparo gera a mesma chave depois de um reinício, mesmo sem o SQLite, e o
+# OneSignal descarta o repetido (a chave vale por 30 dias lá)
+NAMESPACE_IDEMPOTENCIA = uuid.UUID("6f1f8a52-3c1e-4b7d-9a57-2d0c8e4b1f36")
+MAX_TENTATIVAS = 5
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensagens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave TEXT UNIQUE,
+    nome TEXT,
+    titulo TEXT NOT NULL,
+    conteudo TEXT NOT NULL,
+    criado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS envios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mensagem_id INTEGER NOT NULL REFERENCES mensagens(id),
+    segmentos TEXT,
+    destinatarios TEXT,
+    idempotencia TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL,
+    notificacao_id TEXT,
+    erro TEXT,
+    enviado_em REAL
+);
+CREATE INDEX IF NOT EXISTS envios_fila ON envios (status, proxima_tentativa);
+"""
+
+
+class CaixaSaida:
+    """Fila durável de mensagens. Um envio = uma requisição à API (um lote de destinatários)."""
+
+    def __init__(self, caminho):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(ESQUEMA)
+        # Envio interrompido por queda do processo volta para a fila
+        # (a chave de idempotência evita duplicar no OneSignal)
+        self._conn.execute("UPDATE envios SET status = 'pendente' WHERE status = 'enviando'")
+        self.novo = threading.Event()
+
+    def enfileirar(self, titulo, conteudo, segmentos=None, destinatarios=None, chave=None, nome=None):
+        """Enfileira e devolve o id da mensagem; None se a `chave` já foi enfileirada antes."""
+        if destinatarios:
+            lotes = [{"destinatarios": destinatarios[i:i + LOTE_MAXIMO]}
+                     for i in range(0, len(destinatarios), LOTE_MAXIMO)]
+        else:
+            lotes = [{"segmentos": segmentos or ["All"]}]
+        agora = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                cur = self._conn.execute(
+                    "INSERT INTO mensagens (chave, nome, titulo, conteudo, criado_em) VALUES (?, ?, ?, ?, ?)",
+                    (chave, nome, titulo, conteudo, agora))
+                mensagem_id = cur.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO envios (mensagem_id, segmentos, destinatarios, idempotencia, proxima_tentativa)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(mensagem_id, json.dumps(l.get("segmentos")), json.dumps(l.get("destinatarios")),
+                      _idempotencia(chave, i), agora) for i, l in enumerate(lotes)])
+                self._conn.execute("COMMIT")
+            except sqlite3.IntegrityError:
+                self._conn.execute("ROLLBACK")
+                return None
+        self.novo.set()
+        return mensagem_id
+
+    def proximos(self, limite=20):
+        """Marca como 'enviando' e devolve os envios vencidos."""
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT e.*, m.titulo, m.conteudo, m.nome FROM envios e JOIN mensagens m ON m.id = e.mensagem_id"
+                " WHERE e.status = 'pendente' AND e.proxima_tentativa <= ?"
+                " ORDER BY e.proxima_tentativa LIMIT ?", (time.time(), limite)).fetchall()
+            self._conn.executemany("UPDATE envios SET status = 'enviando' WHERE id = ?", [(l["id"],) for l in linhas])
+            return [dict(l) for l in linhas]
+
+    def proxima_tentativa_em(self):
+        with self._lock:
+            linha = self._conn.execute("SELECT MIN(proxima_tentativa) FROM envios WHERE status = 'pendente'").fetchone()
+            return linha[0]
+
+    def marcar_enviado(self, envio_id, notificacao_id, erro=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE envios SET status = 'enviado', notificacao_id = ?, erro = ?, enviado_em = ?,"
+                " tentativas = tentativas + 1 WHERE id = ?", (notificacao_id, erro, time.time(), envio_id))
+
+    def reagendar(self, envio_id, atraso, erro):
+        """Nova tentativa depois de `atraso` segundos, ou 'falhou' ao esgotar as tentativas."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE envios SET tentativas = tentativas + 1, erro = ?, proxima_tentativa = ?,"
+                " status = CASE WHEN tentativas + 1 >= ? THEN 'falhou' ELSE 'pendente' END WHERE id = ?",
+                (erro, time.time() + atraso, MAX_TENTATIVAS, envio_id))
+
+    def marcar_falha(self, envio_id, erro):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE envios SET status = 'falhou', erro = ?, tentativas = tentativas + 1 WHERE id = ?",
+                (erro, envio_id))
+
+    def listar(self, limite=20):
+        """Mensagens recentes com o status agregado dos seus lotes."""
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT m.id, m.nome, m.titulo, m.conteudo, m.criado_em, COUNT(e.id) AS lotes,"
+                " SUM(e.status = 'enviado') AS enviados, SUM(e.status = 'falhou') AS falhas,"
+                " MAX(e.tentativas) AS tentativas, MAX(e.erro) AS erro"
+                " FROM mensagens m JOIN envios e ON e.mensagem_id = m.id"
+                " GROUP BY m.id ORDER BY m.id DESC LIMIT ?", (limite,)).fetchall()
+        resultado = []
+        for l in linhas:
+            if l["enviados"] == l["lotes"]:
+                status = "enviado"
+            elif l["falhas"] and l["falhas"] + l["enviados"] == l["lotes"]:
+                status = "falhou"
+            else:
+                status = "na fila"
+            resultado.append({**dict(l), "status": status})
+        return resultado
+
+
+def _idempotencia(chave, lote):
+    """Chave de idempotência de um lote: estável para mensagens com `chave`, aleatória nas avulsas."""
+    if chave is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(NAMESPACE_IDEMPOTENCIA, f"{chave}#{lote}"))
+
+
+class LimiteTaxa:
+    """Balde de fichas: no máximo `por_segundo` requisições por segundo, em média."""
+
+    def __init__(self, por_segundo, rajada=None):
+        self.por_segundo = por_segundo
+        self.capacidade = rajada or max(1, int(por_segundo))
+        self._fichas = self.capacidade
+        self._ultimo = time.monotonic()
+
+    def aguardar(self):
+        while True:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.por_segundo)
+            self._ultimo = agora
+            if self._fichas >= 1:
+                self._fichas -= 1
+                return
+            time.sleep((1 - self._fichas) / self.por_segundo)
+
+
+class Despachante(threading.Thread):
+    """Thread que esvazia a caixa de saída chamando a API REST do OneSignal."""
+
+    def __init__(self, caixa, sessao, app_id, rest_key, api_url, timeout=10, por_segundo=5,
+                 atraso_base=2.0, atraso_maximo=300.0, ao_enviar=None):
+        super().__init__(name="despachante-notificacoes", daemon=True)
+        self.caixa = caixa
+        self.sessao = sessao
+        self.app_id = app_id
+        self.rest_key = rest_key
+        self.url = api_url.rstrip("/") + "/notifications"
+        self.timeout = timeout
+        self.limite = LimiteTaxa(por_segundo)
+        self.atraso_base = atraso_base
+        self.atraso_maximo = atraso_maximo
+        # Callback opcional (latência em segundos, sucesso) para métricas
+        self.ao_enviar = ao_enviar
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+        self.caixa.novo.set()
+
+    def run(self):
+        while not self._parar.is_set():
+            envios = self.caixa.proximos()
+            for envio in envios:
+                self.limite.aguardar()
+                self.enviar(envio)
+            if envios:
+                continue
+            proxima = self.caixa.proxima_tentativa_em()
+            espera = 60 if proxima is None else max(0.0, min(60, proxima - time.time()))
+            self.caixa.novo.wait(espera)
+            self.caixa.novo.clear()
+
+    def _atraso(self, tentativas, retry_after=None):
+        if retry_after:
+            try:
+                return min(self.atraso_maximo, float(retry_after))
+            except ValueError:
+                pass
+        atraso = min(self.atraso_maximo, self.atraso_base * 2 ** tentativas)
+        return atraso * random.uniform(0.8, 1.2)
+
+    def enviar(self, envio):
+        payload = {
+            "app_id": self.app_id,
+            "headings": {"pt": envio["titulo"], "en": envio["titulo"]},
+            "contents": {"pt": envio["conteudo"], "en": envio["conteudo"]},
+            "idempotency_key": envio["idempotencia"],
+        }
+        if envio["nome"]:
+            payload["name"] = envio["nome"]
+        destinatarios = json.loads(envio["destinatarios"] or "null")
+        if destinatarios:
+            payload["include_subscription_ids"] = destinatarios
+        else:
+            payload["included_segments"] = json.loads(envio["segmentos"] or "null") or ["All"]
+
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "Authorization": f"Basic {self.rest_key}",
+        }
+        inicio = time.perf_counter()
+        try:
+            resposta = self.sessao.post(self.url, headers=headers, data=json.dumps(payload), timeout=self.timeout)
+        except Exception as e:
+            self._registrar(inicio, False)
+            self.caixa.reagendar(envio["id"], self._atraso(envio["tentativas"]), f"Rede: {e}")
+            return
+        self._registrar(inicio, resposta.ok)
+
+        if resposta.ok:
+            try:
+                corpo = resposta.json()
+            except ValueError:
+                corpo = {}
+            erros = corpo.get("errors")
+            self.caixa.marcar_enviado(envio["id"], corpo.get("id"), json.dumps(erros) if erros else None)
+        elif resposta.status_code == 429 or resposta.status_code >= 500:
+            self.caixa.reagendar(envio["id"], self._atraso(envio["tentativas"], resposta.headers.get("Retry-After")),
+                                 f"HTTP {resposta.status_code}")
+        else:
+            self.caixa.marcar_falha(envio["id"], f"HTTP {resposta.status_code}: {resposta.text[:500]}")
+
+    def _registrar(self, inicio, sucesso):
+        if self.ao_enviar:
+            self.ao_enviar(time.perf_counter() - inicio, sucesso)
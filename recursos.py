@@ -0,0 +1,137 @@
+# Arquivo: recursos.py
+# Configuração e clientes HTTP compartilhados pelo processo (Supabase e OneSignal)
+#
+# O main.py guarda o resultado destas funções com st.cache_resource: as conexões
+# são abertas uma vez por processo e reaproveitadas (keep-alive) em todos os reruns.
+
+import locale
+import os
+import time
+from dataclasses import dataclass
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from metricas import TransporteMedido
+from onesignal_sdk.client import Client as OneSignalClient
+from requests.adapters import HTTPAdapter
+from supabase import Client, create_client
+
+
+@dataclass(frozen=True)
+class Configuracao:
+    supabase_url: str | None
+    supabase_key: str | None
+    onesignal_app_id: str | None
+    onesignal_rest_key: str | None
+    onesignal_api_url: str
+    dados_dir: str
+    lembrete_horas: int
+    retorno_dias: int
+    max_conexoes: int
+    max_keepalive: int
+    timeout: float
+    sync_intervalo: float
+    feed_token: str | None
+
+
+def carregar_configuracao():
+    """Lê o .env e ajusta o locale. Chamada uma vez por processo."""
+    # Configurar locale para português do Brasil
+    try:
+        locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+    except locale.Error:
+        pass
+
+    load_dotenv()
+    return Configuracao(
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_ANON_KEY"),
+        onesignal_app_id=os.getenv("ONESIGNAL_APP_ID"),
+        onesignal_rest_key=os.getenv("ONESIGNAL_REST_API_KEY"),
+        onesignal_api_url=os.getenv("ONESIGNAL_API_URL", "https://onesignal.com/api/v1"),
+        dados_dir=os.getenv("DADOS_DIR", "dados"),
+        lembrete_horas=int(os.getenv("LEMBRETE_HORAS_ANTES", "24")),
+        retorno_dias=int(os.getenv("RETORNO_DIAS", "35")),
+        max_conexoes=int(os.getenv("HTTP_MAX_CONEXOES", "10")),
+        max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "5")),
+        timeout=float(os.getenv("HTTP_TIMEOUT", "10")),
+        sync_intervalo=float(os.getenv("SYNC_INTERVALO", "15")),
+        feed_token=os.getenv("FEED_TOKEN"),
+    )
+
+
+def caminho_dados(config, nome):
+    """Caminho de um arquivo local (SQLite) dentro de DADOS_DIR, criando a pasta se preciso."""
+    os.makedirs(config.dados_dir, exist_ok=True)
+    return os.path.join(config.dados_dir, nome)
+
+
+def criar_transporte(config):
+    limites = httpx.Limits(
+        max_connections=config.max_conexoes,
+        max_keepalive_connections=config.max_keepalive,
+        keepalive_expiry=60,
+    )
+    return httpx.HTTPTransport(limits=limites, retries=1)
+
+
+def criar_supabase(config, metricas=None) -> Client:
+    """Cliente Supabase cuja sessão PostgREST usa um pool de conexões persistentes.
+    Com `metricas`, cada chamada é cronometrada por tabela e operação."""
+    cliente = create_client(config.supabase_url, config.supabase_key)
+    postgrest = cliente.postgrest
+    sessao_padrao = postgrest.session
+    transporte = criar_transporte(config)
+    if metricas is not None:
+        transporte = TransporteMedido(transporte, metricas)
+    postgrest.session = httpx.Client(
+        base_url=sessao_padrao.base_url,
+        headers=sessao_padrao.headers,
+        timeout=config.timeout,
+        transport=transporte,
+    )
+    sessao_padrao.close()
+    return cliente
+
+
+def criar_onesignal(config):
+    if not (config.onesignal_app_id and config.onesignal_rest_key):
+        return None
+    return OneSignalClient(app_id=config.onesignal_app_id, rest_api_key=config.onesignal_rest_key)
+
+
+def criar_sessao_http(config):
+    """Sessão requests com pool próprio, para as chamadas REST ao OneSignal."""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=config.max_conexoes, max_retries=0)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+
+def verificar_saude(supabase, config, sessao):
+    """Testa as conexões; devolve uma linha por serviço com status e latência."""
+    resultado = []
+    inicio = time.perf_counter()
+    try:
+        supabase.table("clientes").select("id").limit(1).execute()
+        resultado.append({"servico": "Supabase", "ok": True, "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1), "detalhe": ""})
+    except Exception as e:
+        resultado.append({"servico": "Supabase", "ok": False, "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1), "detalhe": str(e)})
+
+    if not (config.onesignal_app_id and config.onesignal_rest_key):
+        resultado.append({"servico": "OneSignal", "ok": False, "latencia_ms": None,
+                          "detalhe": "ONESIGNAL_APP_ID/ONESIGNAL_REST_API_KEY ausentes"})
+        return resultado
+    # Listar uma notificação exige a chave REST do app: valida chave e app sem enviar nada
+    inicio = time.perf_counter()
+    try:
+        resposta = sessao.get(config.onesignal_api_url.rstrip("/") + "/notifications",
+                              params={"app_id": config.onesignal_app_id, "limit": 1},
+                              headers={"Authorization": f"Basic {config.onesignal_rest_key}"}, timeout=config.timeout)
+        detalhe = "" if resposta.ok else f"HTTP {resposta.status_code}: {resposta.text[:200]}"
+        resultado.append({"servico": "OneSignal", "ok": resposta.ok, "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1), "detalhe": detalhe})
+    except Exception as e:
+        resultado.append({"servico": "OneSignal", "ok": False, "latencia_ms": round((time.perf_counter() - inicio) * 1000, 1), "detalhe": str(e)})
+    return resultado
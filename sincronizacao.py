@@ -0,0 +1,196 @@
+# Arquivo: sincronizacao.py
+# Cópia local de clientes e agendamentos, atualizada por delta (updated_at)
+#
+# A cada ciclo só vêm do banco as linhas com updated_at >= última marca (menos uma
+# pequena margem para transações que terminaram fora de ordem). Exclusões são
+# lápides: a linha volta com deleted_at preenchido e sai da cópia local. O custo
+# de cada atualização depende do número de alterações, não do tamanho das tabelas.
+# Com um `espelho` (espelho.py), a cópia e as marcas também ficam em disco.
+# Com `particoes` ({tabela: chave(linha)}), as linhas também ficam agrupadas por chave
+# (ex.: mês dos agendamentos): ler um mês não percorre a tabela toda.
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+TABELAS = ("clientes", "agendamentos")
+MARGEM_MARCA = timedelta(seconds=5)
+
+
+def buscador_supabase(supabase):
+    """`buscar` do Sincronizador sobre um cliente Supabase."""
+    def buscar(tabela, desde, offset, limite):
+        """Linhas alteradas desde a marca (inclui lápides); sem marca, só as ativas."""
+        query = supabase.table(tabela).select("*")
+        if desde is None:
+            query = query.is_("deleted_at", "null")
+        else:
+            query = query.gte("updated_at", desde)
+        return query.order("updated_at").order("id").range(offset, offset + limite - 1).execute().data
+    return buscar
+
+
+class Sincronizador:
+    """`buscar(tabela, desde, offset, limite)` devolve linhas ordenadas por (updated_at, id);
+    com `desde` None devolve só as linhas ativas (carga inicial)."""
+
+    def __init__(self, buscar, tabelas=TABELAS, tamanho_pagina=1000, espelho=None, particoes=None):
+        self.buscar = buscar
+        self.particoes = particoes or {}
+        self.espelho = espelho
+        self.tabelas = tabelas
+        self.tamanho_pagina = tamanho_pagina
+        self._lock = threading.RLock()
+        self._linhas = {t: {} for t in tabelas}
+        self._marcas = {t: None for t in tabelas}
+        self._por_chave = {t: {} for t in self.particoes}
+        self._ouvintes = []
+        self._parar = threading.Event()
+        self.pronto = False
+        self.ultima_sincronizacao = None
+        # Preenchido enquanto o banco não responde: os dados vêm só da cópia local
+        self.ultimo_erro = None
+        self.alteracoes_recebidas = 0
+
+    # ---------- leitura ----------
+
+    def linhas(self, tabela):
+        with self._lock:
+            return list(self._linhas[tabela].values())
+
+    def obter(self, tabela, linha_id):
+        with self._lock:
+            return self._linhas[tabela].get(linha_id)
+
+    def contar(self, tabela):
+        with self._lock:
+            return len(self._linhas[tabela])
+
+    def marca(self, tabela):
+        return self._marcas[tabela]
+
+    def linhas_particao(self, tabela, chave):
+        with self._lock:
+            return list(self._por_chave[tabela].get(chave, {}).values())
+
+    def linhas_particoes(self, tabela, desde=None, ate=None):
+        """Linhas das partições com chave em [desde, ate] (limites None = abertos)."""
+        with self._lock:
+            return [linha for chave, grupo in self._por_chave[tabela].items()
+                    if (desde is None or chave >= desde) and (ate is None or chave <= ate)
+                    for linha in grupo.values()]
+
+    def _particionar(self, tabela, antes, depois):
+        if tabela not in self.particoes:
+            return
+        grupos = self._por_chave[tabela]
+        chave = self.particoes[tabela]
+        if antes is not None:
+            grupo = grupos.get(chave(antes))
+            if grupo is not None:
+                grupo.pop(antes['id'], None)
+                if not grupo:
+                    del grupos[chave(antes)]
+        if depois is not None:
+            grupos.setdefault(chave(depois), {})[depois['id']] = depois
+
+    # ---------- escrita ----------
+
+    def assinar(self, ouvinte):
+        """`ouvinte(tabela, [(antes, depois), ...])`; `depois` None significa exclusão."""
+        self._ouvintes.append(ouvinte)
+
+    def aplicar(self, tabela, linhas, notificar=True, mover_marca=False):
+        """Aplica linhas vindas do banco (delta ou resposta de uma escrita do próprio app).
+
+        Só o delta move a marca: uma escrita local recente não pode fazer o próximo
+        ciclo pular alterações externas mais antigas que ainda não foram buscadas.
+        """
+        alteracoes = []
+        with self._lock:
+            atuais = self._linhas[tabela]
+            marca = self._marcas[tabela]
+            for linha in linhas:
+                antes = atuais.get(linha['id'])
+                if linha.get('deleted_at'):
+                    if antes is not None:
+                        del atuais[linha['id']]
+                        self._particionar(tabela, antes, None)
+                        alteracoes.append((antes, None))
+                elif antes != linha:
+                    atuais[linha['id']] = linha
+                    self._particionar(tabela, antes, linha)
+                    alteracoes.append((antes, linha))
+                atualizado = linha.get('updated_at')
+                if mover_marca and atualizado and (marca is None or datetime.fromisoformat(atualizado) > datetime.fromisoformat(marca)):
+                    marca = atualizado
+            marca_mudou = marca != self._marcas[tabela]
+            self._marcas[tabela] = marca
+            self.alteracoes_recebidas += len(alteracoes)
+            if self.espelho is not None and (alteracoes or marca_mudou):
+                self.espelho.salvar(tabela, alteracoes, marca if marca_mudou else None)
+        if notificar and alteracoes:
+            for ouvinte in self._ouvintes:
+                ouvinte(tabela, alteracoes)
+        return len(alteracoes)
+
+    def carregar_estado(self, tabela, linhas, marca):
+        """Restaura uma cópia salva (ex.: espelho em disco) sem notificar ninguém."""
+        with self._lock:
+            self._linhas[tabela] = {l['id']: l for l in linhas}
+            if tabela in self.particoes:
+                self._por_chave[tabela] = {}
+                for linha in linhas:
+                    self._particionar(tabela, None, linha)
+            self._marcas[tabela] = marca
+            if marca is not None:
+                self.pronto = True
+
+    def carregar_espelho(self):
+        """Restaura todas as tabelas do espelho; devolve True se havia dados salvos."""
+        for tabela in self.tabelas:
+            self.carregar_estado(tabela, *self.espelho.carregar(tabela))
+        return self.pronto
+
+    def atualizar(self, notificar=True):
+        """Busca e aplica as alterações de todas as tabelas; devolve quantas houve por tabela."""
+        resultado = {}
+        try:
+            for tabela in self.tabelas:
+                desde = self._marcas[tabela]
+                if desde is not None:
+                    desde = (datetime.fromisoformat(desde) - MARGEM_MARCA).isoformat()
+                total = 0
+                offset = 0
+                while True:
+                    pagina = self.buscar(tabela, desde, offset, self.tamanho_pagina)
+                    total += self.aplicar(tabela, pagina, notificar=notificar, mover_marca=True)
+                    if len(pagina) < self.tamanho_pagina:
+                        break
+                    offset += self.tamanho_pagina
+                resultado[tabela] = total
+        except Exception as e:
+            self.ultimo_erro = f"{datetime.now().strftime('%H:%M:%S')} {e}"
+            raise
+        self.pronto = True
+        self.ultimo_erro = None
+        self.ultima_sincronizacao = time.time()
+        return resultado
+
+    # ---------- thread ----------
+
+    def iniciar(self, intervalo):
+        threading.Thread(target=self._laco, args=(intervalo,), name="sincronizador", daemon=True).start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _laco(self, intervalo):
+        # Primeiro ciclo imediato se a cópia veio do espelho (ou a carga inicial falhou)
+        espera = 0 if self.ultima_sincronizacao is None else intervalo
+        while not self._parar.wait(espera):
+            try:
+                self.atualizar()
+            except Exception:
+                pass  # registrado em ultimo_erro; tenta de novo no próximo ciclo
+            espera = intervalo
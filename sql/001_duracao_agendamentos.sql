@@ -0,0 +1,7 @@
+-- Duração de cada agendamento (antes fixa em 1 hora no calendário)
+alter table agendamentos
+    add column if not exists duracao_minutos integer not null default 60
+    check (duracao_minutos > 0);
+
+-- Consultas por período (calendário, lista, conflitos) filtram por data_hora
+create index if not exists agendamentos_data_hora_idx on agendamentos (data_hora);
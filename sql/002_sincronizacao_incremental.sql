@@ -0,0 +1,27 @@
+-- Sincronização incremental: o app busca só as linhas com updated_at >= última marca
+alter table clientes
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists deleted_at timestamptz;
+alter table agendamentos
+    add column if not exists updated_at timestamptz not null default now(),
+    add column if not exists deleted_at timestamptz;
+
+-- updated_at é mantido pelo banco, inclusive para alterações feitas fora do app
+create or replace function marcar_updated_at() returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists clientes_updated_at on clientes;
+create trigger clientes_updated_at before update on clientes
+    for each row execute function marcar_updated_at();
+
+drop trigger if exists agendamentos_updated_at on agendamentos;
+create trigger agendamentos_updated_at before update on agendamentos
+    for each row execute function marcar_updated_at();
+
+-- Delta ordenado por (updated_at, id)
+create index if not exists clientes_updated_at_idx on clientes (updated_at, id);
+create index if not exists agendamentos_updated_at_idx on agendamentos (updated_at, id);
@@ -0,0 +1,36 @@
+-- Troca de status de vários agendamentos numa única chamada (e numa única transação).
+-- Ao marcar "realizado", atualiza também o último atendimento das clientes.
+-- Devolve as linhas alteradas das duas tabelas, para o app atualizar a cópia local.
+create or replace function alterar_status_agendamentos(ids bigint[], novo_status text)
+returns json
+language plpgsql
+as $$
+declare
+    agendamentos_alterados json;
+    clientes_alteradas json := '[]'::json;
+begin
+    if novo_status not in ('nao_confirmado', 'confirmado', 'realizado', 'cancelado') then
+        raise exception 'status inválido: %', novo_status;
+    end if;
+
+    with alterados as (
+        update agendamentos set status = novo_status
+        where id = any(ids) and deleted_at is null
+        returning *
+    )
+    select coalesce(json_agg(alterados), '[]'::json) into agendamentos_alterados from alterados;
+
+    if novo_status = 'realizado' then
+        with alteradas as (
+            update clientes set ultimo_atendimento = now()
+            where deleted_at is null and id in (
+                select cliente_id from agendamentos where id = any(ids) and deleted_at is null
+            )
+            returning *
+        )
+        select coalesce(json_agg(alteradas), '[]'::json) into clientes_alteradas from alteradas;
+    end if;
+
+    return json_build_object('agendamentos', agendamentos_alterados, 'clientes', clientes_alteradas);
+end;
+$$;
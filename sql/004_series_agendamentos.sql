@@ -0,0 +1,55 @@
+-- Séries de agendamentos (retorno a cada N semanas): as ocorrências são linhas comuns
+-- de agendamentos com o mesmo serie_id, criadas num único insert de várias linhas.
+alter table agendamentos add column if not exists serie_id uuid;
+create index if not exists agendamentos_serie_idx on agendamentos (serie_id, data_hora)
+    where serie_id is not null;
+
+-- Edição/cancelamento/exclusão de "só este", "este e os seguintes" ou "toda a série"
+-- numa única chamada (e numa única transação). `deslocamento_minutos` move o horário
+-- de todas as ocorrências alcançadas pelo mesmo tanto, mantendo o espaçamento da série.
+-- Devolve as linhas alteradas, para o app atualizar a cópia local.
+create or replace function editar_serie_agendamentos(
+    ag_id bigint,
+    escopo text,
+    alteracoes jsonb default '{}'::jsonb,
+    deslocamento_minutos integer default 0,
+    excluir boolean default false
+)
+returns json
+language plpgsql
+as $$
+declare
+    alvo agendamentos;
+    alterados_json json;
+begin
+    if escopo not in ('este', 'seguintes', 'todos') then
+        raise exception 'escopo inválido: %', escopo;
+    end if;
+    if alteracoes ? 'status' and alteracoes->>'status' not in ('nao_confirmado', 'confirmado', 'realizado', 'cancelado') then
+        raise exception 'status inválido: %', alteracoes->>'status';
+    end if;
+
+    select * into alvo from agendamentos where id = ag_id and deleted_at is null;
+    if not found then
+        raise exception 'agendamento % não encontrado', ag_id;
+    end if;
+
+    with alterados as (
+        update agendamentos a set
+            deleted_at = case when excluir then now() else a.deleted_at end,
+            data_hora = a.data_hora + make_interval(mins => deslocamento_minutos),
+            cliente_id = coalesce((alteracoes->>'cliente_id')::bigint, a.cliente_id),
+            duracao_minutos = coalesce((alteracoes->>'duracao_minutos')::integer, a.duracao_minutos),
+            status = coalesce(alteracoes->>'status', a.status),
+            observacoes = case when alteracoes ? 'observacoes' then alteracoes->>'observacoes' else a.observacoes end
+        where a.deleted_at is null
+          and (a.id = alvo.id
+               or (escopo <> 'este' and alvo.serie_id is not null and a.serie_id = alvo.serie_id
+                   and (escopo = 'todos' or a.data_hora >= alvo.data_hora)))
+        returning a.*
+    )
+    select coalesce(json_agg(alterados), '[]'::json) into alterados_json from alterados;
+
+    return alterados_json;
+end;
+$$;